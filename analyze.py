@@ -4,7 +4,8 @@ Script di utilità per analizzare i dati raccolti
 """
 import sqlite3
 from datetime import datetime
-from database import NewsDatabase
+from database import NewsDatabase, HIGHLIGHT_START, HIGHLIGHT_END
+from exporter import export_articles
 
 
 def print_separator():
@@ -37,10 +38,11 @@ def show_recent_articles(limit=10):
     cursor = conn.cursor()
 
     cursor.execute("""
-        SELECT title, source_name, published_at, scraping_status,
-               LENGTH(full_text) as text_length
-        FROM news
-        ORDER BY published_at DESC
+        SELECT n.title, n.source_name, n.published_at, n.scraping_status,
+               b.text_length
+        FROM news n
+        LEFT JOIN news_body b ON b.news_id = n.id
+        ORDER BY n.published_at DESC
         LIMIT ?
     """, (limit,))
 
@@ -61,51 +63,34 @@ def show_recent_articles(limit=10):
 
 
 def search_by_keyword(keyword):
-    """Cerca articoli per keyword nel titolo o descrizione"""
-    conn = sqlite3.connect('onconews.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT title, source_name, published_at, url
-        FROM news
-        WHERE title LIKE ? OR description LIKE ?
-        ORDER BY published_at DESC
-        LIMIT 20
-    """, (f'%{keyword}%', f'%{keyword}%'))
-
-    results = cursor.fetchall()
+    """Cerca articoli per keyword in titolo, descrizione e testo completo (ordinati per rilevanza)"""
+    db = NewsDatabase('onconews.db')
+    results = db.search(keyword, limit=20)
 
     print_separator()
     print(f"RICERCA: '{keyword}' - {len(results)} risultati")
     print_separator()
 
     for row in results:
-        date = row['published_at'][:10] if row['published_at'] else "N/A"
+        date = str(row['published_at'])[:10] if row['published_at'] else "N/A"
         print(f"\n[{date}] {row['source_name']}")
         print(f"  {row['title']}")
+        if row['snippet']:
+            snippet = row['snippet'].replace(HIGHLIGHT_START, '*').replace(HIGHLIGHT_END, '*')
+            print(f"  ...{' '.join(snippet.split())}...")
         print(f"  {row['url']}")
 
-    conn.close()
-
 
 def export_to_csv(output_file='onconews_export.csv'):
-    """Esporta tutti gli articoli in CSV"""
-    import csv
-
+    """Esporta tutti gli articoli in CSV (in streaming, senza caricarli in memoria)"""
     db = NewsDatabase('onconews.db')
-    articles = db.export_for_analysis()
-
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        if not articles:
-            print("Nessun articolo da esportare")
-            return
+    count = export_articles(db, output_file, 'csv')
 
-        writer = csv.DictWriter(f, fieldnames=articles[0].keys())
-        writer.writeheader()
-        writer.writerows(articles)
+    if not count:
+        print("Nessun articolo da esportare")
+        return
 
-    print(f"\n✓ Esportati {len(articles)} articoli in: {output_file}")
+    print(f"\n✓ Esportati {count} articoli in: {output_file}")
 
 
 def show_failed_scraping():
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark di OncoNews
+
+Uso:
+    python benchmark.py extraction [--pages 200]
+    python benchmark.py sqlite [--seconds 5] [--readers 2]
+    python benchmark.py bodies [--articles 5000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import yaml
+
+WORDS = ("terapia paziente tumore immunoterapia farmaco studio clinico ricerca "
+         "oncologia trattamento efficacia sperimentazione diagnosi molecola "
+         "risultati università ospedale sopravvivenza metastasi chemioterapia "
+         "perché già più città qualità").split()
+
+
+def load_config(config_path: str = 'config.yaml') -> dict:
+    """Carica la configurazione dal file YAML"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def build_extraction_corpus(pages: int, seed: int = 42) -> List[Tuple[bytes, str]]:
+    """
+    Genera un corpus deterministico di pagine di news simili a quelle reali
+
+    Ogni pagina ha header, menu, sidebar, banner pubblicitari, commenti e
+    un corpo articolo di lunghezza variabile. Metà dichiara il charset solo
+    nel <meta>, un quarto è in windows-1252; una su cinque ha su <html> e
+    <body> classi che contengono parole di boilerplate (es. 'has-sidebar').
+
+    Returns:
+        Lista di (corpo in bytes, header Content-Type)
+    """
+    rng = random.Random(seed)
+    corpus = []
+
+    for i in range(pages):
+        legacy = i % 4 == 0
+        charset = 'windows-1252' if legacy else 'utf-8'
+        header_charset = i % 2 == 1
+        # Classi di stato del tema su <html>/<body>: non devono far scartare la pagina
+        root_classes = ' class="no-js has-sidebar"' if i % 5 == 2 else ''
+        body_classes = ' class="single menu-open"' if i % 5 == 2 else ''
+
+        menu = ''.join(f'<li><a href="/sez/{n}">{rng.choice(WORDS)}</a></li>' for n in range(40))
+        ads = [f'<div class="banner ads-slot-{n}"><p>{_sentence(rng, 12)}</p></div>' for n in range(6)]
+        related = ''.join(f'<li><a href="/art/{n}">{_sentence(rng, 8)}</a></li>' for n in range(15))
+        comments = ''.join(
+            f'<div class="comment"><p>{_sentence(rng, 25)}</p></div>' for n in range(rng.randint(5, 40))
+        )
+        body = ''.join(
+            f'<p>{_sentence(rng, rng.randint(20, 60))}</p>'
+            + (f'<div class="inline-ads"><p>{_sentence(rng, 6)}</p></div>' if n % 5 == 4 else '')
+            for n in range(rng.randint(8, 40))
+        )
+        if i % 3 == 0:
+            main = f'<article><h1>{_sentence(rng, 10)}</h1>{body}</article>'
+        else:
+            main = f'<div class="col"><div class="article-body story">{body}</div></div>'
+
+        html = (
+            f'<!DOCTYPE html><html lang="it"{root_classes}><head><meta charset="{charset}">'
+            f'<title>{_sentence(rng, 8)}</title>'
+            + ''.join(f'<script>var x{n} = {{"k": "{rng.choice(WORDS)}"}};</script>' for n in range(20))
+            + f'<style>body {{ font-family: sans-serif; }}</style></head><body{body_classes}>'
+            f'<header><div class="logo">OncoNews</div><nav><ul>{menu}</ul></nav></header>'
+            f'<div class="menu-mobile"><ul>{menu}</ul></div>'
+            f'<main>{"".join(ads[:3])}{main}{"".join(ads[3:])}'
+            f'<div class="related-articles"><ul>{related}</ul></div>'
+            f'<section class="comments-area">{comments}</section></main>'
+            f'<aside class="sidebar"><p>{_sentence(rng, 30)}</p></aside>'
+            f'<footer><p>{_sentence(rng, 20)}</p></footer>'
+            '<iframe src="https://ads.example.com"></iframe></body></html>'
+        )
+
+        content_type = f'text/html; charset={charset}' if header_charset else 'text/html'
+        corpus.append((html.encode(charset, errors='replace'), content_type))
+
+    return corpus
+
+
+def _time_per_page(corpus: List[Tuple[bytes, str]], extract: Callable) -> Tuple[List[float], List]:
+    timings = []
+    outputs = []
+    for content, content_type in corpus:
+        start = time.perf_counter()
+        outputs.append(extract(content, content_type))
+        timings.append(time.perf_counter() - start)
+    return timings, outputs
+
+
+def bench_extraction(args):
+    """Confronta l'estrattore BeautifulSoup (html.parser + apparent_encoding) con quello lxml"""
+    from requests.models import Response
+    from content_scraper import ContentScraper
+    from html_extractor import decode_html, extract_text
+
+    scraper = ContentScraper(load_config(args.config))
+    corpus = build_extraction_corpus(args.pages)
+    total_kb = sum(len(content) for content, _ in corpus) / 1024
+
+    def bs4_extract(content, content_type):
+        # Percorso precedente: charset da rilevamento statistico, poi BeautifulSoup
+        response = Response()
+        response._content = content
+        response.headers['Content-Type'] = content_type
+        response.encoding = response.apparent_encoding
+        return scraper._extract_with_beautifulsoup(response.text)
+
+    def lxml_extract(content, content_type):
+        return extract_text(decode_html(content, content_type))
+
+    print(f"Corpus: {len(corpus)} pagine, {total_kb:.0f} KB")
+
+    bs4_times, bs4_out = _time_per_page(corpus, bs4_extract)
+    lxml_times, lxml_out = _time_per_page(corpus, lxml_extract)
+
+    for name, timings in (('bs4', bs4_times), ('lxml', lxml_times)):
+        print(f"  {name:5s} media {statistics.mean(timings) * 1000:7.2f} ms/pagina | "
+              f"mediana {statistics.median(timings) * 1000:7.2f} ms | "
+              f"totale {sum(timings):6.2f} s")
+
+    speedups = [b / l for b, l in zip(bs4_times, lxml_times) if l > 0]
+    print(f"  Speed-up per pagina: mediana {statistics.median(speedups):.1f}x, "
+          f"min {min(speedups):.1f}x, max {max(speedups):.1f}x")
+
+    same = sum(1 for a, b in zip(bs4_out, lxml_out) if a == b)
+    print(f"  Testo identico tra i due estrattori: {same}/{len(corpus)} pagine")
+    empty = sum(1 for text in lxml_out if not text)
+    print(f"  Pagine senza testo (lxml): {empty}/{len(corpus)}")
+
+
+# Journaling di default di SQLite (come prima del profilo prestazionale)
+SQLITE_BASELINE = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+    'busy_timeout': 5000,
+}
+
+VIEWER_QUERY = """
+    SELECT * FROM news
+    WHERE title LIKE ? OR description LIKE ?
+    ORDER BY published_at DESC
+    LIMIT 20
+"""
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run_sqlite_workload(db_path: str, pragmas: Dict, seconds: float, readers: int) -> Dict:
+    """
+    Uno scrittore (come main.py) e N lettori (come il web viewer) sullo stesso file
+
+    Lo scrittore inserisce articoli e salva risultati di scraping in piccole
+    transazioni; i lettori eseguono la query della pagina principale del viewer.
+    """
+    from database import NewsDatabase, configure_sqlite_connection
+
+    db = NewsDatabase(db_path, {'sqlite': pragmas})
+    rng = random.Random(7)
+    db.insert_articles([
+        {'url': f'https://seed.example/{n}', 'title': _sentence(rng, 8),
+         'description': _sentence(rng, 30), 'published_at': f'2024-01-{n % 28 + 1:02d}'}
+        for n in range(5000)
+    ])
+
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    commits = [0]
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            batch = [{'url': f'https://new.example/{n + i}', 'title': _sentence(rng, 8),
+                      'description': _sentence(rng, 30), 'published_at': '2024-02-01'}
+                     for i in range(5)]
+            db.insert_articles(batch)
+            db.update_scrape_results([{'url': a['url'], 'success': True, 'text': _sentence(rng, 200)}
+                                      for a in batch])
+            commits[0] += 2
+            n += 5
+
+    def reader():
+        conn = configure_sqlite_connection(sqlite3.connect(db_path), pragmas)
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute(VIEWER_QUERY, ('%terapia%', '%terapia%')).fetchall()
+                conn.execute("SELECT COUNT(*) FROM news WHERE full_text IS NOT NULL").fetchone()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        conn.close()
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    return {'latencies': latencies, 'errors': len(errors), 'commits': commits[0]}
+
+
+def bench_sqlite(args):
+    """Latenza dei lettori del viewer mentre main.py scrive: journaling di default vs profilo WAL"""
+    from database import SQLITE_PRAGMAS
+
+    profiles = (('default', SQLITE_BASELINE), ('wal', SQLITE_PRAGMAS))
+    print(f"Workload: 1 scrittore + {args.readers} lettori per {args.seconds:.0f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pragmas in profiles:
+            result = _run_sqlite_workload(os.path.join(tmp, f'{name}.db'), pragmas,
+                                          args.seconds, args.readers)
+            latencies = result['latencies']
+            print(f"  {name:8s} letture {len(latencies):6d} | "
+                  f"p50 {_percentile(latencies, 0.50) * 1000:7.2f} ms | "
+                  f"p95 {_percentile(latencies, 0.95) * 1000:7.2f} ms | "
+                  f"max {max(latencies) * 1000:8.2f} ms | "
+                  f"commit/s {result['commits'] / args.seconds:7.1f} | "
+                  f"errori lock {result['errors']}")
+
+
+def _build_body_corpus(db_path: str, articles: int, inline: bool) -> None:
+    """
+    Popola un database con articoli scrapati
+
+    inline=True riproduce lo schema precedente (testo in news.full_text, SELECT *
+    nelle liste); altrimenti il testo va compresso in news_body tramite NewsDatabase.
+    """
+    from database import NewsDatabase
+
+    rng = random.Random(11)
+    db = NewsDatabase(db_path)
+    rows = [{'url': f'https://example.org/{n}', 'title': _sentence(rng, 10),
+             'description': _sentence(rng, 30), 'source_name': f'Fonte {n % 25}',
+             'published_at': f'2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}T{n % 24:02d}:00:00'}
+            for n in range(articles)]
+    db.insert_articles(rows)
+
+    for start in range(0, articles, 500):
+        chunk = rows[start:start + 500]
+        texts = [' '.join(_sentence(rng, rng.randint(20, 60)) for _ in range(rng.randint(15, 60)))
+                 for _ in chunk]
+        if inline:
+            with db.connection() as conn:
+                conn.executemany("UPDATE news SET full_text = ?, scraping_status = 'completed' WHERE url = ?",
+                                 [(text, row['url']) for text, row in zip(texts, chunk)])
+                conn.executemany("UPDATE news_fts SET full_text = ? WHERE rowid = "
+                                 "(SELECT id FROM news WHERE url = ?)",
+                                 [(text, row['url']) for text, row in zip(texts, chunk)])
+        else:
+            db.update_scrape_results([{'url': row['url'], 'success': True, 'text': text}
+                                      for text, row in zip(texts, chunk)])
+
+    with db.connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close()
+
+
+def bench_bodies(args):
+    """Corpo degli articoli inline in news vs compresso in news_body: latenza delle liste e dimensione del file"""
+    from database import NewsDatabase, configure_sqlite_connection, encode_cursor
+
+    pages = 200
+    print(f"Corpus: {args.articles} articoli scrapati, {pages} pagine da 20 articoli a profondità casuale")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, inline in (('inline', True), ('news_body', False)):
+            db_path = os.path.join(tmp, f'{name}.db')
+            _build_body_corpus(db_path, args.articles, inline)
+            size_mb = os.path.getsize(db_path) / 1024 / 1024
+
+            conn = configure_sqlite_connection(sqlite3.connect(db_path))
+            positions = conn.execute("SELECT published_at, id FROM news").fetchall()
+            rng = random.Random(3)
+            sample = [rng.choice(positions) for _ in range(pages)]
+
+            timings = []
+            if inline:
+                # Lista come prima: SELECT * trascina anche i corpi degli articoli
+                for published_at, article_id in sample:
+                    start = time.perf_counter()
+                    conn.execute("""
+                        SELECT * FROM news WHERE (published_at, id) < (?, ?)
+                        ORDER BY published_at DESC, id DESC LIMIT 20
+                    """, (published_at, article_id)).fetchall()
+                    timings.append(time.perf_counter() - start)
+            else:
+                db = NewsDatabase(db_path)
+                for published_at, article_id in sample:
+                    start = time.perf_counter()
+                    db.list_articles(after=encode_cursor(published_at, article_id), limit=20)
+                    timings.append(time.perf_counter() - start)
+                db.close()
+
+            # Scansione completa senza indice, con connessione nuova. scraping_error viene dopo
+            # full_text nello schema: nel layout inline la lettura attraversa le pagine di overflow
+            conn.close()
+            scans = []
+            for _ in range(5):
+                conn = sqlite3.connect(db_path)
+                start = time.perf_counter()
+                conn.execute("SELECT COUNT(*) FROM news WHERE description LIKE '%zzz%' "
+                             "OR scraping_error LIKE '%zzz%'").fetchone()
+                scans.append(time.perf_counter() - start)
+                conn.close()
+            scan = statistics.median(scans)
+
+            results[name] = (size_mb, timings, scan)
+            print(f"  {name:9s} file {size_mb:7.1f} MB | pagina mediana "
+                  f"{statistics.median(timings) * 1000:6.2f} ms, p95 {_percentile(timings, 0.95) * 1000:6.2f} ms | "
+                  f"scansione news {scan * 1000:7.1f} ms")
+
+        before, after = results['inline'], results['news_body']
+        print(f"  File: {after[0] / before[0] * 100:.0f}% | pagina mediana: "
+              f"{statistics.median(before[1]) / statistics.median(after[1]):.1f}x | "
+              f"scansione: {before[2] / after[2]:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark OncoNews")
+    parser.add_argument('--config', default='config.yaml', help="File di configurazione")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    extraction = subparsers.add_parser('extraction', help="Estrazione testo: BeautifulSoup vs lxml")
+    extraction.add_argument('--pages', type=int, default=200, help="Pagine nel corpus di test")
+    extraction.set_defaults(func=bench_extraction)
+
+    sqlite = subparsers.add_parser('sqlite', help="Letture concorrenti a uno scrittore: default vs WAL")
+    sqlite.add_argument('--seconds', type=float, default=5, help="Durata di ogni workload")
+    sqlite.add_argument('--readers', type=int, default=2, help="Thread lettori (web viewer)")
+    sqlite.set_defaults(func=bench_sqlite)
+
+    bodies = subparsers.add_parser('bodies', help="Testo inline in news vs compresso in news_body")
+    bodies.add_argument('--articles', type=int, default=5000, help="Articoli nel corpus di test")
+    bodies.set_defaults(func=bench_bodies)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
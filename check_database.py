@@ -5,12 +5,16 @@ Script per verificare la qualità dei dati nel database
 import sqlite3
 import sys
 
+from database import decompress_text
+
 def check_database():
     """Verifica qualità testi nel database"""
 
     try:
         conn = sqlite3.connect('onconews.db')
         conn.row_factory = sqlite3.Row
+        # Il testo completo è compresso in news_body: body_text(b.body) lo restituisce in chiaro
+        conn.create_function('body_text', 1, decompress_text, deterministic=True)
         cursor = conn.cursor()
 
         print("=" * 80)
@@ -20,7 +24,7 @@ def check_database():
 
         # Statistiche generali
         total = cursor.execute("SELECT COUNT(*) as count FROM news").fetchone()['count']
-        with_text = cursor.execute("SELECT COUNT(*) as count FROM news WHERE full_text IS NOT NULL AND LENGTH(full_text) > 0").fetchone()['count']
+        with_text = cursor.execute("SELECT COUNT(*) as count FROM news_body WHERE text_length > 0").fetchone()['count']
 
         print(f"📊 STATISTICHE GENERALI")
         print(f"   Articoli totali: {total}")
@@ -38,12 +42,13 @@ def check_database():
         # Analisi lunghezze
         stats = cursor.execute("""
             SELECT
-                AVG(LENGTH(full_text)) as media,
-                MIN(LENGTH(full_text)) as minima,
-                MAX(LENGTH(full_text)) as massima,
-                AVG(LENGTH(description)) as media_desc
-            FROM news
-            WHERE full_text IS NOT NULL AND LENGTH(full_text) > 0
+                AVG(b.text_length) as media,
+                MIN(b.text_length) as minima,
+                MAX(b.text_length) as massima,
+                AVG(LENGTH(n.description)) as media_desc
+            FROM news n
+            JOIN news_body b ON b.news_id = n.id
+            WHERE b.text_length > 0
         """).fetchone()
 
         print(f"📏 LUNGHEZZA TESTI")
@@ -57,18 +62,18 @@ def check_database():
         print(f"🔍 CONFRONTO DESCRIPTION vs FULL_TEXT")
         same = cursor.execute("""
             SELECT COUNT(*) as count
-            FROM news
-            WHERE full_text IS NOT NULL
-            AND description IS NOT NULL
-            AND full_text = description
+            FROM news n
+            JOIN news_body b ON b.news_id = n.id
+            WHERE n.description IS NOT NULL
+            AND body_text(b.body) = n.description
         """).fetchone()['count']
 
         similar = cursor.execute("""
             SELECT COUNT(*) as count
-            FROM news
-            WHERE full_text IS NOT NULL
-            AND description IS NOT NULL
-            AND LENGTH(full_text) - LENGTH(description) < 100
+            FROM news n
+            JOIN news_body b ON b.news_id = n.id
+            WHERE n.description IS NOT NULL
+            AND b.text_length - LENGTH(n.description) < 100
         """).fetchone()['count']
 
         print(f"   Articoli dove full_text = description: {same}")
@@ -86,13 +91,13 @@ def check_database():
         print()
 
         articles = cursor.execute("""
-            SELECT title,
-                   LENGTH(description) as len_desc,
-                   LENGTH(full_text) as len_full,
-                   scraping_status,
-                   url
-            FROM news
-            WHERE full_text IS NOT NULL
+            SELECT n.title,
+                   LENGTH(n.description) as len_desc,
+                   b.text_length as len_full,
+                   n.scraping_status,
+                   body_text(b.body) as full_text
+            FROM news n
+            JOIN news_body b ON b.news_id = n.id
             ORDER BY RANDOM()
             LIMIT 3
         """).fetchall()
@@ -105,8 +110,7 @@ def check_database():
             print(f"      Differenza: {art['len_full'] - art['len_desc']} caratteri")
 
             # Mostra primi 200 caratteri del full_text
-            full = cursor.execute("SELECT full_text FROM news WHERE url = ?", (art['url'],)).fetchone()['full_text']
-            print(f"      Inizio testo: {full[:200]}...")
+            print(f"      Inizio testo: {art['full_text'][:200]}...")
             print()
 
         conn.close()
@@ -1,25 +1,45 @@
 """
 Modulo per l'estrazione del testo completo dagli articoli
 """
-import requests
 from bs4 import BeautifulSoup
 from newspaper import Article
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import logging
-import time
 from urllib.parse import urlparse
 
+from http_client import get_client
+from html_extractor import decode_html, extract_text, is_html_content_type, limit_dom
+from retry_policy import is_retryable_error
+
 logger = logging.getLogger(__name__)
 
+# Blocchi letti dalla risposta (già decompressi) durante il download in streaming
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UnsupportedContent(Exception):
+    """La risposta non è una pagina HTML (PDF, video, immagini...)"""
+
 
 class ContentScraper:
     """Gestisce l'estrazione del testo completo dagli URL delle notizie"""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, archive=None):
+        """
+        Args:
+            config: Configurazione
+            archive: HtmlArchive dove salvare l'HTML scaricato (None = nessun archivio)
+        """
         self.config = config
+        self.archive = archive
         self.timeout = config['scraping']['timeout']
         self.max_retries = config['scraping']['max_retries']
         self.user_agent = config['scraping']['user_agent']
+        # Estrattore di fallback: 'lxml' (veloce, una sola visita del DOM) o 'bs4'
+        self.extractor = config['scraping'].get('extractor', 'lxml')
+        # Limiti per pagina: byte scaricati (dopo la decompressione) e tag passati al parsing
+        self.max_download_bytes = config['scraping'].get('max_download_bytes', 5 * 1024 * 1024)
+        self.max_dom_elements = config['scraping'].get('max_dom_elements', 30000)
         self.headers = {
             'User-Agent': self.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -27,172 +47,201 @@ class ContentScraper:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         }
+        self.http = get_client(config)
 
     def scrape_article(self, url: str, title: str = "") -> Dict:
         """
         Estrae il testo completo di un articolo usando newspaper3k
 
+        La pagina viene scaricata una sola volta con il client HTTP condiviso;
+        lo stesso HTML viene passato sia a newspaper3k sia all'estrattore di fallback.
+
         Args:
             url: URL dell'articolo
             title: Titolo dell'articolo (opzionale, per logging)
 
         Returns:
-            Dizionario con 'success', 'text', 'error'
+            Dizionario con 'success', 'text', 'error' e, in caso di errore di
+            download, 'retryable' (True se l'errore è temporaneo)
         """
-        result = {
-            'success': False,
-            'text': None,
-            'error': None
-        }
+        html, error, retryable = self.fetch_html(url)
+        if error:
+            return {'success': False, 'text': None, 'error': error, 'retryable': retryable}
+
+        return extract_article(url, html, self.extractor, title)
+
+    def fetch_html(self, url: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Fase di I/O dello scraping: verifica il dominio e scarica la pagina
+
+        Args:
+            url: URL dell'articolo
 
+        Returns:
+            (html, None, False) se il download è riuscito, altrimenti
+            (None, messaggio di errore, True se l'errore è temporaneo)
+        """
         # Verifica dominio
         domain = urlparse(url).netloc
-        if self._is_excluded_domain(domain):
-            result['error'] = f"Dominio escluso: {domain}"
-            logger.debug(result['error'])
-            return result
+        if self.is_excluded_domain(domain):
+            error = f"Dominio escluso: {domain}"
+            logger.debug(error)
+            return None, error, False
 
-        newspaper_text = None
-        bs4_text = None
-
-        # Prova prima con newspaper3k (più affidabile)
         try:
-            logger.debug(f"Scraping with newspaper3k: {url}")
-            article = Article(url, language='it')
-            article.download()
-            article.parse()
+            return self.download_page(url)
+        except UnsupportedContent as e:
+            return None, str(e), False
+
+    def download_page(self, url: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Scarica la pagina senza verificare il dominio
 
-            if article.text and len(article.text) > 100:
-                newspaper_text = article.text
-                logger.debug(f"Newspaper3k extracted {len(newspaper_text)} chars")
-            else:
-                logger.debug(f"Newspaper3k extracted insufficient text for: {url}")
+        Args:
+            url: URL dell'articolo
 
+        Returns:
+            Come fetch_html
+
+        Raises:
+            UnsupportedContent: se la risposta non è HTML (non è un errore del sito)
+        """
+        try:
+            return self._download(url), None, False
+        except UnsupportedContent:
+            raise
         except Exception as e:
-            logger.debug(f"Newspaper3k failed for {url}: {e}")
+            logger.warning(f"Download failed for {url}: {e}")
+            return None, f"Download fallito: {e}", is_retryable_error(e)
 
-        # Se newspaper3k ha estratto poco (<3000 caratteri) o è fallito, prova ANCHE BeautifulSoup
-        # per confrontare e usare il testo più lungo
-        if not newspaper_text or len(newspaper_text) < 3000:
-            try:
-                logger.debug(f"Trying BeautifulSoup to get more complete text: {url}")
-                bs4_text = self._scrape_with_beautifulsoup(url)
+    def _download(self, url: str) -> str:
+        """
+        Scarica la pagina dell'articolo
 
-                if bs4_text:
-                    logger.debug(f"BeautifulSoup extracted {len(bs4_text)} chars")
+        Args:
+            url: URL dell'articolo
 
+        La risposta è letta in streaming: le risposte non HTML sono scartate
+        dopo gli header, il corpo (decompresso a blocchi) si ferma a
+        `max_download_bytes` e l'HTML oltre `max_dom_elements` tag è troncato.
+
+        Returns:
+            HTML decodificato
+
+        Raises:
+            requests.exceptions.RequestException: se il download fallisce
+            UnsupportedContent: se la risposta non è HTML
+        """
+        # I retry con backoff esponenziale sono gestiti dal pool del client HTTP
+        with self.http.get(
+            url,
+            headers=self.headers,
+            timeout=self.timeout,
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type')
+            if not is_html_content_type(content_type):
+                raise UnsupportedContent(f"Contenuto non HTML: {content_type}")
+            content = self._read_capped(response, url)
+
+        # Charset da header e meta tag: evita il rilevamento statistico su tutto il corpo
+        html = decode_html(content, content_type)
+        if self.archive is not None:
+            # L'archivio conserva la pagina intera, prima del limite sul DOM
+            try:
+                self.archive.put(url, html)
             except Exception as e:
-                logger.debug(f"BeautifulSoup failed for {url}: {e}")
-
-        # Scegli il testo più lungo tra i due metodi
-        if newspaper_text and bs4_text:
-            if len(bs4_text) > len(newspaper_text):
-                result['success'] = True
-                result['text'] = bs4_text
-                logger.info(f"Using BeautifulSoup text ({len(bs4_text)} chars, longer than newspaper {len(newspaper_text)}): {title[:50]}...")
-            else:
-                result['success'] = True
-                result['text'] = newspaper_text
-                logger.info(f"Using Newspaper text ({len(newspaper_text)} chars): {title[:50]}...")
-        elif newspaper_text:
-            result['success'] = True
-            result['text'] = newspaper_text
-            logger.info(f"Successfully scraped ({len(newspaper_text)} chars): {title[:50]}...")
-        elif bs4_text:
-            result['success'] = True
-            result['text'] = bs4_text
-            logger.info(f"Successfully scraped with BS4 ({len(bs4_text)} chars): {title[:50]}...")
+                logger.warning(f"Failed to archive {url}: {e}")
+        return limit_dom(html, self.max_dom_elements)
+
+    def _read_capped(self, response, url: str) -> bytes:
+        """Legge il corpo della risposta fino a max_download_bytes"""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_download_bytes:
+                break
         else:
-            result['error'] = "Nessun testo estratto con nessun metodo"
-            logger.warning(f"No text extracted for: {url}")
+            return b''.join(chunks)
 
-        return result
+        # Pagina troppo grande: si tiene l'inizio, tagliato alla fine di un tag
+        # per non spezzare un carattere multibyte
+        content = b''.join(chunks)[:self.max_download_bytes]
+        end = content.rfind(b'>')
+        logger.info(f"Download truncated at {self.max_download_bytes} bytes: {url}")
+        return content[:end + 1] if end > 0 else content
 
-    def _scrape_with_beautifulsoup(self, url: str) -> Optional[str]:
+    @staticmethod
+    def _extract_with_beautifulsoup(html: str) -> Optional[str]:
         """
         Estrae il testo usando BeautifulSoup (fallback)
 
         Args:
-            url: URL dell'articolo
+            html: HTML della pagina già scaricata
 
         Returns:
             Testo estratto o None
         """
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(
-                    url,
-                    headers=self.headers,
-                    timeout=self.timeout,
-                    allow_redirects=True
-                )
-                response.raise_for_status()
-                response.encoding = response.apparent_encoding
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Rimuovi script, style, nav, footer, ads
-                for element in soup(['script', 'style', 'nav', 'footer', 'aside',
-                                    'header', 'iframe', 'noscript']):
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Rimuovi script, style, nav, footer, ads
+        for element in soup(['script', 'style', 'nav', 'footer', 'aside',
+                            'header', 'iframe', 'noscript']):
+            element.decompose()
+
+        # Rimuovi elementi comuni di advertising/tracking
+        for class_name in ['advertisement', 'ads', 'social-share', 'comments',
+                          'related-articles', 'sidebar', 'menu']:
+            for element in soup.find_all(class_=lambda x: x and class_name in x.lower()):
+                # <html> e <body> restano, anche con classi come 'has-sidebar'
+                if element.name not in ('html', 'body'):
                     element.decompose()
 
-                # Rimuovi elementi comuni di advertising/tracking
-                for class_name in ['advertisement', 'ads', 'social-share', 'comments',
-                                  'related-articles', 'sidebar', 'menu']:
-                    for element in soup.find_all(class_=lambda x: x and class_name in x.lower()):
-                        element.decompose()
-
-                # Cerca il contenuto principale
-                main_content = None
+        # Cerca il contenuto principale
+        main_content = None
 
-                # Prova con tag article
-                main_content = soup.find('article')
-
-                # Prova con div contenuto principale
-                if not main_content:
-                    for class_name in ['article-body', 'article-content', 'post-content',
-                                      'entry-content', 'content-body', 'main-content']:
-                        main_content = soup.find(class_=lambda x: x and class_name in x.lower())
-                        if main_content:
-                            break
-
-                # Fallback: cerca tutti i paragrafi
-                if not main_content:
-                    main_content = soup.find('body')
+        # Prova con tag article
+        main_content = soup.find('article')
 
+        # Prova con div contenuto principale
+        if not main_content:
+            for class_name in ['article-body', 'article-content', 'post-content',
+                              'entry-content', 'content-body', 'main-content']:
+                main_content = soup.find(class_=lambda x: x and class_name in x.lower())
                 if main_content:
-                    # Estrai solo i paragrafi
-                    paragraphs = main_content.find_all('p')
-                    text = '\n\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+                    break
 
-                    # Pulizia finale
-                    text = ' '.join(text.split())  # Normalizza spazi bianchi
+        # Fallback: cerca tutti i paragrafi
+        if not main_content:
+            main_content = soup.find('body')
 
-                    return text if len(text) > 100 else None
+        if main_content:
+            # Estrai solo i paragrafi
+            paragraphs = main_content.find_all('p')
+            text = '\n\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
 
-                return None
+            # Pulizia finale
+            text = ' '.join(text.split())  # Normalizza spazi bianchi
 
-            except requests.exceptions.RequestException as e:
-                logger.debug(f"Attempt {attempt + 1}/{self.max_retries} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    raise
+            return text if len(text) > 100 else None
 
         return None
 
-    def _is_excluded_domain(self, domain: str) -> bool:
+    def is_excluded_domain(self, domain: str) -> bool:
         """Verifica se il dominio è nella lista di esclusione"""
         excluded = self.config.get('excluded_domains', [])
         return any(excl in domain for excl in excluded)
 
-    def scrape_batch(self, articles: list, delay: float = 2.0) -> Dict[str, Dict]:
+    def scrape_batch(self, articles: list) -> Dict[str, Dict]:
         """
-        Scrape multipli articoli con rate limiting
+        Scrape multipli articoli (il rate limiting per host è nel client HTTP)
 
         Args:
             articles: Lista di dizionari con 'url' e 'title'
-            delay: Pausa tra le richieste (secondi)
 
         Returns:
             Dizionario {url: result} con i risultati
@@ -211,10 +260,6 @@ class ContentScraper:
             result = self.scrape_article(url, title)
             results[url] = result
 
-            # Pausa tra le richieste
-            if i < total:
-                time.sleep(delay)
-
         # Statistiche
         successful = sum(1 for r in results.values() if r['success'])
         logger.info(f"Batch scraping completed: {successful}/{total} successful")
@@ -257,3 +302,89 @@ class ContentScraper:
             cleaned_lines.append(line.strip())
 
         return '\n\n'.join(cleaned_lines)
+
+
+def _extract_fallback(html: str, extractor: str) -> Optional[str]:
+    """Estrae il testo con l'estrattore di fallback configurato"""
+    if extractor == 'bs4':
+        return ContentScraper._extract_with_beautifulsoup(html)
+    return extract_text(html)
+
+
+def extract_article(url: str, html: str, extractor: str = 'lxml', title: str = "") -> Dict:
+    """
+    Fase CPU dello scraping: estrae il testo da un HTML già scaricato
+
+    Funzione di modulo (e non metodo) perché possa essere eseguita in un
+    ProcessPoolExecutor: non usa rete né stato condiviso.
+
+    Args:
+        url: URL dell'articolo (usato da newspaper3k e per il logging)
+        html: HTML decodificato della pagina
+        extractor: Estrattore di fallback ('lxml' o 'bs4')
+        title: Titolo dell'articolo (opzionale, per logging)
+
+    Returns:
+        Dizionario con 'success', 'text', 'error'
+    """
+    result = {
+        'success': False,
+        'text': None,
+        'error': None
+    }
+
+    newspaper_text = None
+    fallback_text = None
+
+    # Prova prima con newspaper3k (più affidabile)
+    try:
+        logger.debug(f"Parsing with newspaper3k: {url}")
+        article = Article(url, language='it')
+        article.download(input_html=html)
+        article.parse()
+
+        if article.text and len(article.text) > 100:
+            newspaper_text = article.text
+            logger.debug(f"Newspaper3k extracted {len(newspaper_text)} chars")
+        else:
+            logger.debug(f"Newspaper3k extracted insufficient text for: {url}")
+
+    except Exception as e:
+        logger.debug(f"Newspaper3k failed for {url}: {e}")
+
+    # Se newspaper3k ha estratto poco (<3000 caratteri) o è fallito, prova ANCHE l'estrattore
+    # di fallback (lxml o BeautifulSoup) per confrontare e usare il testo più lungo
+    if not newspaper_text or len(newspaper_text) < 3000:
+        try:
+            logger.debug(f"Trying {extractor} extractor to get more complete text: {url}")
+            fallback_text = _extract_fallback(html, extractor)
+
+            if fallback_text:
+                logger.debug(f"{extractor} extractor extracted {len(fallback_text)} chars")
+
+        except Exception as e:
+            logger.debug(f"{extractor} extractor failed for {url}: {e}")
+
+    # Scegli il testo più lungo tra i due metodi
+    if newspaper_text and fallback_text:
+        if len(fallback_text) > len(newspaper_text):
+            result['success'] = True
+            result['text'] = fallback_text
+            logger.info(f"Using {extractor} text ({len(fallback_text)} chars, longer than newspaper {len(newspaper_text)}): {title[:50]}...")
+        else:
+            result['success'] = True
+            result['text'] = newspaper_text
+            logger.info(f"Using Newspaper text ({len(newspaper_text)} chars): {title[:50]}...")
+    elif newspaper_text:
+        result['success'] = True
+        result['text'] = newspaper_text
+        logger.info(f"Successfully scraped ({len(newspaper_text)} chars): {title[:50]}...")
+    elif fallback_text:
+        result['success'] = True
+        result['text'] = fallback_text
+        logger.info(f"Successfully scraped with {extractor} ({len(fallback_text)} chars): {title[:50]}...")
+    else:
+        result['error'] = "Nessun testo estratto con nessun metodo"
+        logger.warning(f"No text extracted for: {url}")
+
+    return result
@@ -1,10 +1,20 @@
 """
 Gestione database per OncoNews (supporta SQLite e PostgreSQL)
+
+Le connessioni sono riusate: un ThreadedConnectionPool per PostgreSQL e una
+connessione persistente per thread per SQLite. Tutti i metodi passano da
+`connection()`, che esegue commit/rollback e restituisce la connessione al pool.
 """
+import base64
+import json
 import os
 import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,108 +25,748 @@ USE_POSTGRES = DATABASE_URL is not None
 
 if USE_POSTGRES:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     logger.info("Using PostgreSQL database")
 else:
     logger.info("Using SQLite database")
 
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 5
+
+# Marcatori dei termini trovati negli snippet di search() (il chiamante li sostituisce,
+# es. con <mark> nel web viewer dopo l'escaping HTML)
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+# Colonne delle card nelle liste (alias n = news, b = news_body): niente corpo dell'articolo
+LIST_COLUMNS = ('n.id, n.url, n.title, n.source_name, n.author, n.published_at, n.description, '
+                'n.keywords_matched, n.fetched_at, n.scraping_status, b.text_length')
+
+# Rilascia il lease della coda di scraping (articolo non più in lavorazione)
+RELEASE_LEASE = 'lease_owner = NULL, lease_expires_at = NULL'
+
+# Articoli da scrapare adesso: in attesa, senza lease valido e con l'eventuale retry già scaduto
+SCRAPE_DUE = ("scraping_status = 'pending' "
+              "AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP) "
+              "AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)")
+
+# Il testo completo è salvato compresso nella tabella news_body
+BODY_COMPRESSION_LEVEL = 6
+
+# tsvector di titolo (peso A) e descrizione (peso B); il testo completo (peso C) si aggiunge allo scraping
+PG_HEADER_VECTOR = ("setweight(to_tsvector('italian', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('italian', coalesce(description, '')), 'B')")
+
+
+def compress_text(text: str) -> bytes:
+    """Comprime il testo di un articolo per la tabella news_body"""
+    return zlib.compress(text.encode('utf-8'), BODY_COMPRESSION_LEVEL)
+
+
+def decompress_text(body) -> Optional[str]:
+    """Decomprime un valore della colonna news_body.body (bytes, memoryview o None)"""
+    if body is None:
+        return None
+    return zlib.decompress(body).decode('utf-8')
+
+
+def encode_cursor(published_at, article_id: int) -> str:
+    """Token opaco di paginazione per la posizione (published_at, id)"""
+    if isinstance(published_at, datetime):
+        published_at = published_at.isoformat()
+    raw = json.dumps([published_at, article_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str):
+    """
+    Decodifica un token di encode_cursor
+
+    Returns:
+        (published_at, id) oppure None se il token non è valido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        published_at, article_id = json.loads(raw)
+        if (published_at is not None and not isinstance(published_at, str)) or not isinstance(article_id, int):
+            return None
+        return published_at, article_id
+    except (ValueError, TypeError):
+        return None
+
+# Profilo prestazionale SQLite applicato a ogni connessione (sovrascrivibile da database.sqlite)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # I lettori non sono bloccati dallo scrittore
+    'synchronous': 'NORMAL',  # In WAL: fsync solo ai checkpoint, non a ogni commit
+    'mmap_size': 268435456,  # 256 MB letti via memory map
+    'cache_size': -65536,  # 64 MB di page cache (valori negativi = KiB)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # ms di attesa su un lock prima di "database is locked"
+}
+
+
+def configure_sqlite_connection(conn, pragmas: Optional[Dict] = None):
+    """
+    Applica il profilo prestazionale a una connessione SQLite
+
+    Args:
+        conn: Connessione sqlite3
+        pragmas: Valori che sostituiscono quelli di SQLITE_PRAGMAS
+                 (None come valore lascia il default di SQLite)
+
+    Returns:
+        La stessa connessione
+    """
+    settings = dict(SQLITE_PRAGMAS)
+    settings.update(pragmas or {})
+
+    for name, value in settings.items():
+        if name not in SQLITE_PRAGMAS:
+            logger.warning(f"Unknown SQLite pragma ignored: {name}")
+            continue
+        if value is not None:
+            conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
 
 class NewsDatabase:
     """Gestisce il database per le notizie oncologiche (SQLite o PostgreSQL)"""
 
-    def __init__(self, db_path: str = "onconews.db"):
+    def __init__(self, db_path: str = "onconews.db", config: Optional[Dict] = None):
+        """
+        Args:
+            db_path: File del database SQLite (ignorato con DATABASE_URL)
+            config: Sezione `database` della configurazione (pool_min, pool_max, sqlite)
+        """
+        config = config or {}
         self.db_path = db_path
         self.use_postgres = USE_POSTGRES
         self.database_url = DATABASE_URL
+        self.pool_min = max(0, config.get('pool_min', DEFAULT_POOL_MIN))
+        self.pool_max = max(1, config.get('pool_max', DEFAULT_POOL_MAX), self.pool_min)
+        self.sqlite_pragmas = config.get('sqlite') or {}
+        self.fts_enabled = True
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool solleva un errore se esaurito: il semaforo fa invece attendere
+        self._slots = threading.BoundedSemaphore(self.pool_max)
+        self._local = threading.local()
+        self._sqlite_connections = []
+        self._stats_lock = threading.Lock()
+        self._stats = {'checkouts': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'connections_opened': 0}
 
         if not self.use_postgres:
             self.init_database()
 
     def get_connection(self):
-        """Ottiene una connessione al database (SQLite o PostgreSQL)"""
+        """
+        Apre una nuova connessione al database (SQLite o PostgreSQL)
+
+        La connessione non fa parte del pool: va chiusa dal chiamante.
+        Per l'uso interno si veda `connection()`.
+        """
         if self.use_postgres:
             return psycopg2.connect(self.database_url)
         else:
-            return sqlite3.connect(self.db_path)
+            return configure_sqlite_connection(sqlite3.connect(self.db_path), self.sqlite_pragmas)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.pool_min, self.pool_max, self.database_url)
+                self._record_opened(self.pool_min)
+                logger.info(f"PostgreSQL connection pool: {self.pool_min}-{self.pool_max} connections")
+            return self._pool
+
+    def _sqlite_connection(self):
+        """Connessione SQLite persistente del thread corrente"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            configure_sqlite_connection(conn, self.sqlite_pragmas)
+            self._local.conn = conn
+            with self._stats_lock:
+                self._sqlite_connections.append(conn)
+            self._record_opened(1)
+        return conn
+
+    def _record_opened(self, count: int):
+        with self._stats_lock:
+            self._stats['connections_opened'] += count
+
+    def _record_wait(self, waited: float):
+        with self._stats_lock:
+            self._stats['checkouts'] += 1
+            self._stats['wait_total'] += waited
+            self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+
+    @contextmanager
+    def connection(self):
+        """
+        Prende una connessione dal pool per la durata del blocco `with`
+
+        Esegue il commit se il blocco termina senza errori, altrimenti il
+        rollback (e rilancia l'eccezione). Con PostgreSQL attende se tutte
+        le `pool_max` connessioni sono in uso.
+
+        Yields:
+            Connessione DB-API (psycopg2 o sqlite3)
+        """
+        start = time.perf_counter()
+        if self.use_postgres:
+            self._slots.acquire()
+            try:
+                conn = self._get_pool().getconn()
+            except Exception:
+                self._slots.release()
+                raise
+        else:
+            conn = self._sqlite_connection()
+        self._record_wait(time.perf_counter() - start)
+
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.debug(f"Rollback failed: {e}")
+            raise
+        finally:
+            if self.use_postgres:
+                # Le connessioni interrotte vengono chiuse invece di tornare nel pool
+                self._pool.putconn(conn, close=bool(conn.closed))
+                self._slots.release()
+
+    def _dict_cursor(self, conn):
+        """Cursore che restituisce righe convertibili in dict"""
+        if self.use_postgres:
+            return conn.cursor(cursor_factory=RealDictCursor)
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+
+    def get_pool_stats(self) -> Dict:
+        """
+        Statistiche di utilizzo del pool
+
+        Returns:
+            Dizionario con checkouts, connections_opened, wait_total_ms, wait_avg_ms, wait_max_ms
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        checkouts = stats['checkouts']
+        return {
+            'checkouts': checkouts,
+            'connections_opened': stats['connections_opened'],
+            'wait_total_ms': stats['wait_total'] * 1000,
+            'wait_avg_ms': stats['wait_total'] * 1000 / checkouts if checkouts else 0.0,
+            'wait_max_ms': stats['wait_max'] * 1000,
+        }
+
+    def close(self):
+        """Chiude tutte le connessioni del pool"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+        with self._stats_lock:
+            connections, self._sqlite_connections = self._sqlite_connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
 
     def init_database(self):
         """Inizializza il database creando le tabelle necessarie"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            if self.use_postgres:
+                # Schema PostgreSQL
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS news (
+                        id SERIAL PRIMARY KEY,
+                        url TEXT UNIQUE NOT NULL,
+                        title TEXT NOT NULL,
+                        source_name TEXT,
+                        author TEXT,
+                        published_at TIMESTAMP,
+                        description TEXT,
+                        full_text TEXT,
+                        keywords_matched TEXT,
+                        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        scraping_status TEXT DEFAULT 'pending',
+                        scraping_error TEXT,
+                        language TEXT DEFAULT 'it'
+                    )
+                """)
+            else:
+                # Schema SQLite
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS news (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        url TEXT UNIQUE NOT NULL,
+                        title TEXT NOT NULL,
+                        source_name TEXT,
+                        author TEXT,
+                        published_at TIMESTAMP,
+                        description TEXT,
+                        full_text TEXT,
+                        keywords_matched TEXT,
+                        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        scraping_status TEXT DEFAULT 'pending',
+                        scraping_error TEXT,
+                        language TEXT DEFAULT 'it'
+                    )
+                """)
+
+            # Indici per ottimizzare le query (compatibili con entrambi)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_published_at
+                ON news(published_at DESC)
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_source_name
+                ON news(source_name)
+            """)
+
+            # Paginazione a cursore su (published_at, id), anche filtrata per fonte
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_news_keyset
+                ON news(published_at DESC, id DESC)
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_news_source_keyset
+                ON news(source_name, published_at DESC, id DESC)
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scraping_status
+                ON news(scraping_status)
+            """)
 
+            # Validatori HTTP dei feed RSS (ETag/Last-Modified + digest degli entry)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    feed_url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    entries_digest TEXT,
+                    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Watermark del fetch incrementale: ultima pubblicazione vista per (fonte, keyword)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS fetch_watermarks (
+                    source TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    last_published_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source, keyword)
+                )
+            """)
+
+            # Richieste consumate per giorno sulle API con quota (es. News API free tier)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS api_usage (
+                    provider TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (provider, day)
+                )
+            """)
+
+            # Salute dei domini scrapati e stato del circuit breaker (domain_health.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS domain_health (
+                    domain TEXT PRIMARY KEY,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                    latency_p50_ms REAL,
+                    latency_p95_ms REAL,
+                    last_error TEXT,
+                    last_error_at TIMESTAMP,
+                    open_until TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            self._init_search_index(cursor)
+            self._init_stats(cursor)
+            self._init_bodies(cursor)
+            self._init_scrape_queue(cursor)
+
+        db_type = "PostgreSQL" if self.use_postgres else "SQLite"
+        logger.info(f"Database inizializzato: {db_type}")
+
+    def _init_search_index(self, cursor):
+        """
+        Crea l'indice full-text su titolo, descrizione e testo completo
+
+        PostgreSQL: colonna tsvector (configurazione 'italian') con indice GIN.
+        SQLite: tabella FTS5 (tokenizer unicode61 senza diacritici).
+        Titolo e descrizione sono indicizzati da trigger all'inserimento; il testo
+        completo, che vive compresso in news_body, è aggiunto da _write_bodies.
+        """
         if self.use_postgres:
-            # Schema PostgreSQL
+            # Le versioni precedenti usavano una colonna generata da news.full_text
+            cursor.execute("""
+                SELECT is_generated FROM information_schema.columns
+                WHERE table_name = 'news' AND column_name = 'search_vector'
+            """)
+            row = cursor.fetchone()
+            if row and row[0] == 'ALWAYS':
+                cursor.execute("ALTER TABLE news ALTER COLUMN search_vector DROP EXPRESSION")
+            elif row is None:
+                cursor.execute("ALTER TABLE news ADD COLUMN search_vector tsvector")
+                cursor.execute(f"""
+                    UPDATE news SET search_vector = {PG_HEADER_VECTOR} ||
+                        setweight(to_tsvector('italian', coalesce(full_text, '')), 'C')
+                """)
+
+            cursor.execute(f"""
+                CREATE OR REPLACE FUNCTION news_search_vector_init() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {PG_HEADER_VECTOR.replace('title', 'NEW.title').replace('description', 'NEW.description')};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute("DROP TRIGGER IF EXISTS news_search_vector_trigger ON news")
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS news (
-                    id SERIAL PRIMARY KEY,
-                    url TEXT UNIQUE NOT NULL,
-                    title TEXT NOT NULL,
-                    source_name TEXT,
-                    author TEXT,
-                    published_at TIMESTAMP,
-                    description TEXT,
-                    full_text TEXT,
-                    keywords_matched TEXT,
-                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    scraping_status TEXT DEFAULT 'pending',
-                    scraping_error TEXT,
-                    language TEXT DEFAULT 'it'
+                CREATE TRIGGER news_search_vector_trigger BEFORE INSERT ON news
+                FOR EACH ROW EXECUTE FUNCTION news_search_vector_init()
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_news_search ON news USING GIN (search_vector)
+            """)
+            return
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'")
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                    title, description, full_text,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            # SQLite compilato senza FTS5: search() ripiega su LIKE
+            logger.warning(f"FTS5 not available, search falls back to LIKE: {e}")
+            self.fts_enabled = False
+            return
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+                INSERT INTO news_fts (rowid, title, description, full_text)
+                VALUES (new.id, new.title, new.description, new.full_text);
+            END
+        """)
+        # Ricreato a ogni avvio: le versioni precedenti copiavano anche news.full_text
+        cursor.execute("DROP TRIGGER IF EXISTS news_fts_update")
+        cursor.execute("""
+            CREATE TRIGGER news_fts_update AFTER UPDATE OF title, description ON news BEGIN
+                UPDATE news_fts SET title = new.title, description = new.description
+                WHERE rowid = new.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+                DELETE FROM news_fts WHERE rowid = old.id;
+            END
+        """)
+
+        if not exists:
+            # Database esistente: indicizza gli articoli già presenti
+            cursor.execute("""
+                INSERT INTO news_fts (rowid, title, description, full_text)
+                SELECT id, title, description, full_text FROM news
+            """)
+
+    def _init_bodies(self, cursor):
+        """
+        Crea la tabella news_body (testo completo compresso, fuori dalla tabella news)
+
+        Le righe di news restano piccole, così liste e scansioni non leggono i
+        corpi degli articoli. I testi ancora presenti in news.full_text (database
+        creati con versioni precedenti) vengono spostati e compressi.
+        """
+        if self.use_postgres:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS news_body (
+                    news_id INTEGER PRIMARY KEY REFERENCES news(id) ON DELETE CASCADE,
+                    body BYTEA NOT NULL,
+                    text_length INTEGER NOT NULL,
+                    scraped_at TIMESTAMP
                 )
             """)
         else:
-            # Schema SQLite
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS news (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    title TEXT NOT NULL,
-                    source_name TEXT,
-                    author TEXT,
-                    published_at TIMESTAMP,
-                    description TEXT,
-                    full_text TEXT,
-                    keywords_matched TEXT,
-                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    scraping_status TEXT DEFAULT 'pending',
-                    scraping_error TEXT,
-                    language TEXT DEFAULT 'it'
+                CREATE TABLE IF NOT EXISTS news_body (
+                    news_id INTEGER PRIMARY KEY REFERENCES news(id) ON DELETE CASCADE,
+                    body BLOB NOT NULL,
+                    text_length INTEGER NOT NULL,
+                    scraped_at TIMESTAMP
+                )
+            """)
+            # SQLite applica ON DELETE CASCADE solo con PRAGMA foreign_keys attivo
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS news_body_delete AFTER DELETE ON news BEGIN
+                    DELETE FROM news_body WHERE news_id = old.id;
+                END
+            """)
+
+        # Momento dello scraping, usato dagli export incrementali
+        if self._ensure_column(cursor, 'news_body', 'scraped_at', 'TIMESTAMP'):
+            cursor.execute("""
+                UPDATE news_body SET scraped_at = (
+                    SELECT fetched_at FROM news WHERE news.id = news_body.news_id
                 )
             """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_body_scraped_at ON news_body(scraped_at)")
 
-        # Indici per ottimizzare le query (compatibili con entrambi)
+        p = '%s' if self.use_postgres else '?'
+        moved = 0
+        while True:
+            cursor.execute("SELECT id, full_text, fetched_at FROM news WHERE full_text IS NOT NULL LIMIT 500")
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(f"""
+                INSERT INTO news_body (news_id, body, text_length, scraped_at) VALUES ({p}, {p}, {p}, {p})
+                ON CONFLICT (news_id) DO NOTHING
+            """, [(row[0], compress_text(row[1]), len(row[1]), row[2]) for row in rows])
+            cursor.executemany(f"UPDATE news SET full_text = NULL WHERE id = {p}",
+                               [(row[0],) for row in rows])
+            moved += len(rows)
+
+        if moved:
+            logger.info(f"Moved {moved} article bodies to news_body")
+
+    def _init_scrape_queue(self, cursor):
+        """
+        Colonne della coda di scraping sulla tabella news
+
+        Un articolo 'pending' è preso in carico da un worker con un lease
+        (lease_owner, lease_expires_at) che il worker rinnova finché lavora;
+        se il worker muore il lease scade e l'articolo torna disponibile.
+        scrape_attempts conta le prese in carico; next_attempt_at rimanda un
+        articolo fallito per un errore temporaneo (retry con backoff).
+        """
+        self._ensure_column(cursor, 'news', 'lease_owner', 'TEXT')
+        self._ensure_column(cursor, 'news', 'lease_expires_at', 'TIMESTAMP')
+        self._ensure_column(cursor, 'news', 'scrape_attempts', 'INTEGER NOT NULL DEFAULT 0')
+        self._ensure_column(cursor, 'news', 'next_attempt_at', 'TIMESTAMP')
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_published_at
-            ON news(published_at DESC)
+            CREATE INDEX IF NOT EXISTS idx_news_scrape_queue
+            ON news(scraping_status, lease_expires_at)
         """)
 
+    def _ensure_column(self, cursor, table: str, column: str, definition: str) -> bool:
+        """
+        Aggiunge una colonna a una tabella esistente se manca (migrazione dello schema)
+
+        Returns:
+            True se la colonna è stata aggiunta
+        """
+        if self.use_postgres:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s
+            """, (table, column))
+            exists = cursor.fetchone() is not None
+        else:
+            cursor.execute(f"PRAGMA table_info({table})")
+            exists = any(row[1] == column for row in cursor.fetchall())
+
+        if not exists:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Added column {table}.{column}")
+        return not exists
+
+    def _write_bodies(self, cursor, texts: List[tuple]):
+        """
+        Salva testi completi in news_body e li aggiunge all'indice full-text
+
+        Args:
+            cursor: Cursore della transazione corrente
+            texts: Lista di (testo, url)
+        """
+        if not texts:
+            return
+
+        p = '%s' if self.use_postgres else '?'
+        cursor.executemany(f"""
+            INSERT INTO news_body (news_id, body, text_length, scraped_at)
+            SELECT id, {p}, {p}, CURRENT_TIMESTAMP FROM news WHERE url = {p}
+            ON CONFLICT (news_id) DO UPDATE SET
+                body = excluded.body,
+                text_length = excluded.text_length,
+                scraped_at = excluded.scraped_at
+        """, [(compress_text(text), len(text), url) for text, url in texts])
+
+        if self.use_postgres:
+            cursor.executemany(f"""
+                UPDATE news SET search_vector = {PG_HEADER_VECTOR} ||
+                    setweight(to_tsvector('italian', %s), 'C')
+                WHERE url = %s
+            """, texts)
+        elif self.fts_enabled:
+            cursor.executemany("""
+                UPDATE news_fts SET full_text = ?
+                WHERE rowid = (SELECT id FROM news WHERE url = ?)
+            """, texts)
+
+    def get_article_text(self, article_id: int) -> Optional[str]:
+        """Testo completo di un articolo (None se non ancora scrapato)"""
+        p = '%s' if self.use_postgres else '?'
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT body FROM news_body WHERE news_id = {p}", (article_id,))
+            row = cursor.fetchone()
+        return decompress_text(row[0]) if row else None
+
+    def _init_stats(self, cursor):
+        """
+        Crea la tabella riassuntiva news_stats e i trigger che la aggiornano
+
+        news_stats ha una riga per (fonte, stato di scraping) con il numero di
+        articoli; i trigger su news la tengono allineata a ogni INSERT, DELETE e
+        cambio di fonte o stato, così le statistiche non richiedono COUNT(*).
+        Le fonti e gli stati NULL sono registrati come stringa vuota.
+        """
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_source_name
-            ON news(source_name)
+            CREATE TABLE IF NOT EXISTS news_stats (
+                source_name TEXT NOT NULL,
+                scraping_status TEXT NOT NULL,
+                articles INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (source_name, scraping_status)
+            )
         """)
 
+        if self.use_postgres:
+            cursor.execute("""
+                CREATE OR REPLACE FUNCTION news_stats_sync() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        UPDATE news_stats SET articles = articles - 1
+                        WHERE source_name = COALESCE(OLD.source_name, '')
+                          AND scraping_status = COALESCE(OLD.scraping_status, '');
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO news_stats (source_name, scraping_status, articles)
+                        VALUES (COALESCE(NEW.source_name, ''), COALESCE(NEW.scraping_status, ''), 1)
+                        ON CONFLICT (source_name, scraping_status)
+                        DO UPDATE SET articles = news_stats.articles + 1;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute("DROP TRIGGER IF EXISTS news_stats_trigger ON news")
+            cursor.execute("""
+                CREATE TRIGGER news_stats_trigger
+                AFTER INSERT OR DELETE OR UPDATE OF source_name, scraping_status ON news
+                FOR EACH ROW EXECUTE FUNCTION news_stats_sync()
+            """)
+        else:
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS news_stats_insert AFTER INSERT ON news BEGIN
+                    INSERT INTO news_stats (source_name, scraping_status, articles)
+                    VALUES (COALESCE(new.source_name, ''), COALESCE(new.scraping_status, ''), 1)
+                    ON CONFLICT (source_name, scraping_status) DO UPDATE SET articles = articles + 1;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS news_stats_update
+                AFTER UPDATE OF source_name, scraping_status ON news
+                WHEN old.source_name IS NOT new.source_name
+                  OR old.scraping_status IS NOT new.scraping_status
+                BEGIN
+                    UPDATE news_stats SET articles = articles - 1
+                    WHERE source_name = COALESCE(old.source_name, '')
+                      AND scraping_status = COALESCE(old.scraping_status, '');
+                    INSERT INTO news_stats (source_name, scraping_status, articles)
+                    VALUES (COALESCE(new.source_name, ''), COALESCE(new.scraping_status, ''), 1)
+                    ON CONFLICT (source_name, scraping_status) DO UPDATE SET articles = articles + 1;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS news_stats_delete AFTER DELETE ON news BEGIN
+                    UPDATE news_stats SET articles = articles - 1
+                    WHERE source_name = COALESCE(old.source_name, '')
+                      AND scraping_status = COALESCE(old.scraping_status, '');
+                END
+            """)
+
+        # Database esistente (o tabella svuotata): popola la tabella dai dati attuali
+        cursor.execute("SELECT COUNT(*) FROM news_stats")
+        if cursor.fetchone()[0] == 0:
+            self._recompute_stats(cursor)
+
+    @staticmethod
+    def _recompute_stats(cursor):
+        cursor.execute("DELETE FROM news_stats")
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_scraping_status
-            ON news(scraping_status)
+            INSERT INTO news_stats (source_name, scraping_status, articles)
+            SELECT COALESCE(source_name, ''), COALESCE(scraping_status, ''), COUNT(*)
+            FROM news
+            GROUP BY COALESCE(source_name, ''), COALESCE(scraping_status, '')
         """)
 
-        conn.commit()
-        conn.close()
+    def reconcile_stats(self) -> Dict:
+        """
+        Ricalcola news_stats da zero confrontandola con la tabella news
 
-        db_type = "PostgreSQL" if self.use_postgres else "SQLite"
-        logger.info(f"Database inizializzato: {db_type}")
+        Da usare dopo modifiche fatte a mano sul database o a trigger disattivati.
+
+        Returns:
+            Differenze corrette: {(fonte, stato): (valore precedente, valore reale)}
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if not self.use_postgres and not conn.in_transaction:
+                # Nessuna scrittura su news tra la lettura e il ricalcolo
+                cursor.execute("BEGIN IMMEDIATE")
+            elif self.use_postgres:
+                cursor.execute("LOCK TABLE news IN SHARE MODE")
+
+            cursor.execute("SELECT source_name, scraping_status, articles FROM news_stats")
+            before = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+            self._recompute_stats(cursor)
+            cursor.execute("SELECT source_name, scraping_status, articles FROM news_stats")
+            after = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+        drift = {}
+        for key in set(before) | set(after):
+            if before.get(key, 0) != after.get(key, 0):
+                drift[key] = (before.get(key, 0), after.get(key, 0))
+
+        if drift:
+            logger.warning(f"news_stats reconciled: {len(drift)} rows corrected")
+        else:
+            logger.info("news_stats is consistent with news")
+        return drift
 
     def article_exists(self, url: str) -> bool:
         """Verifica se un articolo esiste già nel database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        if self.use_postgres:
-            cursor.execute("SELECT COUNT(*) FROM news WHERE url = %s", (url,))
-        else:
-            cursor.execute("SELECT COUNT(*) FROM news WHERE url = ?", (url,))
+            if self.use_postgres:
+                cursor.execute("SELECT COUNT(*) FROM news WHERE url = %s", (url,))
+            else:
+                cursor.execute("SELECT COUNT(*) FROM news WHERE url = ?", (url,))
 
-        count = cursor.fetchone()[0]
-        conn.close()
+            count = cursor.fetchone()[0]
         return count > 0
 
     def insert_article(self, article_data: Dict) -> bool:
@@ -130,44 +780,25 @@ class NewsDatabase:
             logger.debug(f"Articolo già esistente: {article_data['url']}")
             return False
 
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
         try:
-            if self.use_postgres:
-                cursor.execute("""
-                    INSERT INTO news (
-                        url, title, source_name, author, published_at,
-                        description, keywords_matched, language
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    article_data['url'],
-                    article_data['title'],
-                    article_data.get('source_name'),
-                    article_data.get('author'),
-                    article_data.get('published_at'),
-                    article_data.get('description'),
-                    article_data.get('keywords_matched'),
-                    article_data.get('language', 'it')
-                ))
-            else:
-                cursor.execute("""
-                    INSERT INTO news (
-                        url, title, source_name, author, published_at,
-                        description, keywords_matched, language
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    article_data['url'],
-                    article_data['title'],
-                    article_data.get('source_name'),
-                    article_data.get('author'),
-                    article_data.get('published_at'),
-                    article_data.get('description'),
-                    article_data.get('keywords_matched'),
-                    article_data.get('language', 'it')
-                ))
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute("""
+                        INSERT INTO news (
+                            url, title, source_name, author, published_at,
+                            description, keywords_matched, language
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, self._article_row(article_data))
+                else:
+                    cursor.execute("""
+                        INSERT INTO news (
+                            url, title, source_name, author, published_at,
+                            description, keywords_matched, language
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, self._article_row(article_data))
 
-            conn.commit()
             logger.info(f"Articolo inserito: {article_data['title'][:50]}...")
             return True
         except (psycopg2.IntegrityError if self.use_postgres else sqlite3.IntegrityError):
@@ -176,153 +807,919 @@ class NewsDatabase:
         except Exception as e:
             logger.error(f"Errore inserimento articolo: {e}")
             return False
-        finally:
-            conn.close()
+
+    @staticmethod
+    def _article_row(article_data: Dict) -> tuple:
+        """Valori di un articolo nell'ordine delle colonne di INSERT"""
+        return (
+            article_data['url'],
+            article_data['title'],
+            article_data.get('source_name'),
+            article_data.get('author'),
+            article_data.get('published_at'),
+            article_data.get('description'),
+            article_data.get('keywords_matched'),
+            article_data.get('language', 'it')
+        )
+
+    def insert_articles(self, articles: List[Dict], batch_size: int = 500) -> List[str]:
+        """
+        Inserisce più articoli in un'unica transazione, ignorando gli URL già presenti
+
+        Args:
+            articles: Articoli da inserire (stesso formato di insert_article)
+            batch_size: Righe per singolo statement
+
+        Returns:
+            URL degli articoli effettivamente inseriti (nell'ordine di input)
+
+        Raises:
+            Exception: l'errore del database, dopo il rollback dell'intera transazione
+        """
+        # Deduplica nel batch e scarta righe che violerebbero NOT NULL
+        rows = {}
+        for article in articles:
+            if article.get('url') and article.get('title') and article['url'] not in rows:
+                rows[article['url']] = self._article_row(article)
+
+        if not rows:
+            return []
+
+        urls = list(rows)
+        inserted = set()
+
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                for start in range(0, len(urls), batch_size):
+                    chunk = urls[start:start + batch_size]
+
+                    if self.use_postgres:
+                        returned = execute_values(cursor, """
+                            INSERT INTO news (
+                                url, title, source_name, author, published_at,
+                                description, keywords_matched, language
+                            ) VALUES %s
+                            ON CONFLICT (url) DO NOTHING
+                            RETURNING url
+                        """, [rows[url] for url in chunk], page_size=batch_size, fetch=True)
+                        inserted.update(row[0] for row in returned)
+                    else:
+                        # Il lock di scrittura preso subito rende esatto l'elenco dei nuovi URL
+                        if not conn.in_transaction:
+                            cursor.execute("BEGIN IMMEDIATE")
+                        placeholders = ','.join('?' * len(chunk))
+                        cursor.execute(f"SELECT url FROM news WHERE url IN ({placeholders})", chunk)
+                        existing = {row[0] for row in cursor.fetchall()}
+
+                        cursor.executemany("""
+                            INSERT OR IGNORE INTO news (
+                                url, title, source_name, author, published_at,
+                                description, keywords_matched, language
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, [rows[url] for url in chunk if url not in existing])
+                        inserted.update(url for url in chunk if url not in existing)
+        except Exception as e:
+            # Rilanciata: il chiamante non deve avanzare watermark e cache dei feed
+            logger.error(f"Errore inserimento batch articoli: {e}")
+            raise
+
+        logger.info(f"Articoli inseriti: {len(inserted)} nuovi su {len(rows)}")
+        return [url for url in urls if url in inserted]
 
     def update_full_text(self, url: str, full_text: str, status: str = 'completed'):
         """Aggiorna il testo completo di un articolo dopo lo scraping"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
         try:
-            if self.use_postgres:
-                cursor.execute("""
-                    UPDATE news
-                    SET full_text = %s, scraping_status = %s
-                    WHERE url = %s
-                """, (full_text, status, url))
-            else:
-                cursor.execute("""
-                    UPDATE news
-                    SET full_text = ?, scraping_status = ?
-                    WHERE url = ?
-                """, (full_text, status, url))
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                self._write_bodies(cursor, [(full_text, url)])
+
+                if self.use_postgres:
+                    cursor.execute(f"UPDATE news SET scraping_status = %s, {RELEASE_LEASE} WHERE url = %s",
+                                   (status, url))
+                else:
+                    cursor.execute(f"UPDATE news SET scraping_status = ?, {RELEASE_LEASE} WHERE url = ?",
+                                   (status, url))
 
-            conn.commit()
             logger.debug(f"Testo aggiornato per: {url}")
         except Exception as e:
             logger.error(f"Errore aggiornamento testo: {e}")
-        finally:
-            conn.close()
 
     def update_scraping_error(self, url: str, error: str):
         """Registra un errore durante lo scraping"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute(f"""
+                        UPDATE news
+                        SET scraping_status = 'failed', scraping_error = %s, {RELEASE_LEASE}
+                        WHERE url = %s
+                    """, (error, url))
+                else:
+                    cursor.execute(f"""
+                        UPDATE news
+                        SET scraping_status = 'failed', scraping_error = ?, {RELEASE_LEASE}
+                        WHERE url = ?
+                    """, (error, url))
+        except Exception as e:
+            logger.error(f"Errore registrazione errore scraping: {e}")
+
+    def update_scrape_results(self, results: List[Dict], retry_policy=None):
+        """
+        Scrive i risultati di più scraping in un'unica transazione
+
+        Args:
+            results: Lista di dizionari con 'url', 'success', 'text', 'error' e
+                     l'eventuale 'retryable' (il formato restituito da
+                     ContentScraper.scrape_article più l'URL)
+            retry_policy: Politica dei retry (RetryPolicy); se indicata, gli articoli
+                          falliti per un errore temporaneo tornano in coda con
+                          next_attempt_at invece di essere marcati 'failed'
+
+        I risultati con 'retry_after' (secondi) sono articoli non tentati, ad esempio
+        per il circuit breaker del dominio: tornano in coda dopo quel ritardo e la
+        presa in carico non conta come tentativo.
+        """
+        if not results:
+            return
+
+        p = '%s' if self.use_postgres else '?'
+        completed = [(r['text'], r['url']) for r in results if r['success']]
+        deferred = [(r.get('error'), int(r['retry_after']), r['url'])
+                    for r in results if not r['success'] and r.get('retry_after') is not None]
+        failures = [r for r in results if not r['success'] and r.get('retry_after') is None]
 
         try:
-            if self.use_postgres:
-                cursor.execute("""
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                self._write_bodies(cursor, completed)
+
+                attempts = {}
+                if retry_policy is not None:
+                    attempts = self._scrape_attempts(cursor, [r['url'] for r in failures if r.get('retryable')])
+
+                failed, retries = [], []
+                for r in failures:
+                    error = r.get('error') or 'Unknown error'
+                    delay = retry_policy.next_delay(attempts[r['url']]) if r['url'] in attempts else None
+                    if delay is None:
+                        failed.append((error, r['url']))
+                    else:
+                        retries.append((error, int(delay), r['url']))
+
+                cursor.executemany(f"""
                     UPDATE news
-                    SET scraping_status = 'failed', scraping_error = %s
-                    WHERE url = %s
-                """, (error, url))
-            else:
-                cursor.execute("""
+                    SET scraping_status = 'completed', next_attempt_at = NULL, {RELEASE_LEASE}
+                    WHERE url = {p}
+                """, [(url,) for _, url in completed])
+                cursor.executemany(f"""
+                    UPDATE news
+                    SET scraping_status = 'failed', scraping_error = {p}, next_attempt_at = NULL, {RELEASE_LEASE}
+                    WHERE url = {p}
+                """, failed)
+                cursor.executemany(f"""
+                    UPDATE news
+                    SET scraping_status = 'pending', scraping_error = {p},
+                        next_attempt_at = {self._seconds_from_now()}, {RELEASE_LEASE}
+                    WHERE url = {p}
+                """, retries)
+                cursor.executemany(f"""
                     UPDATE news
-                    SET scraping_status = 'failed', scraping_error = ?
-                    WHERE url = ?
-                """, (error, url))
+                    SET scraping_status = 'pending', scraping_error = {p}, scrape_attempts = scrape_attempts - 1,
+                        next_attempt_at = {self._seconds_from_now()}, {RELEASE_LEASE}
+                    WHERE url = {p}
+                """, deferred)
 
-            conn.commit()
+            logger.debug(f"Risultati scraping salvati: {len(completed)} completati, {len(failed)} falliti, "
+                         f"{len(retries) + len(deferred)} da riprovare")
         except Exception as e:
-            logger.error(f"Errore registrazione errore scraping: {e}")
-        finally:
-            conn.close()
+            logger.error(f"Errore salvataggio risultati scraping: {e}")
+
+    def update_reextracted_texts(self, results: List[Dict]):
+        """
+        Salva i testi ottenuti rieseguendo l'estrazione sull'HTML archiviato
+
+        A differenza di update_scrape_results non tocca i lease: un articolo
+        preso in carico da un worker in questo momento resta suo.
+
+        Args:
+            results: Lista di dizionari con 'url' e 'text'
+        """
+        if not results:
+            return
+
+        p = '%s' if self.use_postgres else '?'
+        texts = [(r['text'], r['url']) for r in results]
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                self._write_bodies(cursor, texts)
+                cursor.executemany(f"""
+                    UPDATE news SET scraping_status = 'completed', next_attempt_at = NULL
+                    WHERE url = {p}
+                """, [(url,) for _, url in texts])
+            logger.debug(f"Testi riestratti salvati: {len(texts)}")
+        except Exception as e:
+            logger.error(f"Errore salvataggio testi riestratti: {e}")
+
+    def _scrape_attempts(self, cursor, urls: List[str]) -> Dict[str, int]:
+        """Tentativi di scraping già eseguiti per ogni URL"""
+        if not urls:
+            return {}
+        placeholders = ', '.join(['%s' if self.use_postgres else '?'] * len(urls))
+        cursor.execute(f"SELECT url, scrape_attempts FROM news WHERE url IN ({placeholders})", urls)
+        return {url: attempts for url, attempts in cursor.fetchall()}
+
+    def get_feed_validators(self, feed_url: str) -> Optional[Dict]:
+        """
+        Restituisce i validatori salvati per un feed RSS
+
+        Returns:
+            Dizionario con 'etag', 'last_modified', 'entries_digest' o None
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute("""
+                        SELECT etag, last_modified, entries_digest
+                        FROM feed_cache WHERE feed_url = %s
+                    """, (feed_url,))
+                else:
+                    cursor.execute("""
+                        SELECT etag, last_modified, entries_digest
+                        FROM feed_cache WHERE feed_url = ?
+                    """, (feed_url,))
+
+                row = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Errore lettura cache feed: {e}")
+            return None
+
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'entries_digest': row[2]}
+
+    def save_feed_validators(self, feed_url: str, etag: Optional[str],
+                             last_modified: Optional[str], entries_digest: Optional[str]):
+        """Salva (o aggiorna) i validatori di un feed RSS"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute("""
+                        INSERT INTO feed_cache (feed_url, etag, last_modified, entries_digest, checked_at)
+                        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                        ON CONFLICT (feed_url) DO UPDATE SET
+                            etag = EXCLUDED.etag,
+                            last_modified = EXCLUDED.last_modified,
+                            entries_digest = EXCLUDED.entries_digest,
+                            checked_at = EXCLUDED.checked_at
+                    """, (feed_url, etag, last_modified, entries_digest))
+                else:
+                    cursor.execute("""
+                        INSERT INTO feed_cache (feed_url, etag, last_modified, entries_digest, checked_at)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT (feed_url) DO UPDATE SET
+                            etag = excluded.etag,
+                            last_modified = excluded.last_modified,
+                            entries_digest = excluded.entries_digest,
+                            checked_at = excluded.checked_at
+                    """, (feed_url, etag, last_modified, entries_digest))
+        except Exception as e:
+            logger.error(f"Errore salvataggio cache feed: {e}")
+
+    def get_watermarks(self, source: str) -> Dict[str, datetime]:
+        """
+        Restituisce i watermark di una fonte
+
+        Args:
+            source: Nome della fonte ('newsapi', 'google_news', 'reddit')
+
+        Returns:
+            Dizionario {keyword: data di pubblicazione più recente vista}
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute("""
+                        SELECT keyword, last_published_at FROM fetch_watermarks WHERE source = %s
+                    """, (source,))
+                else:
+                    cursor.execute("""
+                        SELECT keyword, last_published_at FROM fetch_watermarks WHERE source = ?
+                    """, (source,))
+
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Errore lettura watermark: {e}")
+            return {}
+
+        watermarks = {}
+        for keyword, value in rows:
+            # SQLite restituisce stringhe ISO, PostgreSQL oggetti datetime
+            watermarks[keyword] = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        return watermarks
+
+    def update_watermarks(self, source: str, watermarks: Dict[str, datetime]):
+        """Aggiorna i watermark di una fonte (il valore non torna mai indietro)"""
+        if not watermarks:
+            return
+
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.executemany("""
+                        INSERT INTO fetch_watermarks (source, keyword, last_published_at, updated_at)
+                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                        ON CONFLICT (source, keyword) DO UPDATE SET
+                            last_published_at = GREATEST(fetch_watermarks.last_published_at, EXCLUDED.last_published_at),
+                            updated_at = EXCLUDED.updated_at
+                    """, [(source, kw, ts) for kw, ts in watermarks.items()])
+                else:
+                    cursor.executemany("""
+                        INSERT INTO fetch_watermarks (source, keyword, last_published_at, updated_at)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT (source, keyword) DO UPDATE SET
+                            last_published_at = MAX(last_published_at, excluded.last_published_at),
+                            updated_at = excluded.updated_at
+                    """, [(source, kw, ts.isoformat(timespec='seconds')) for kw, ts in watermarks.items()])
+        except Exception as e:
+            logger.error(f"Errore aggiornamento watermark: {e}")
+
+    def get_api_usage(self, provider: str, day: str) -> int:
+        """
+        Restituisce le richieste già consumate su un'API in un giorno
+
+        Args:
+            provider: Nome dell'API (es. 'newsapi')
+            day: Giorno in formato YYYY-MM-DD (UTC)
+
+        Returns:
+            Numero di richieste registrate
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute(
+                        "SELECT requests FROM api_usage WHERE provider = %s AND day = %s", (provider, day)
+                    )
+                else:
+                    cursor.execute(
+                        "SELECT requests FROM api_usage WHERE provider = ? AND day = ?", (provider, day)
+                    )
+
+                row = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Errore lettura utilizzo API: {e}")
+            return 0
+
+        return row[0] if row else 0
+
+    def record_api_usage(self, provider: str, day: str, requests: int = 1):
+        """Incrementa il contatore delle richieste consumate su un'API"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                if self.use_postgres:
+                    cursor.execute("""
+                        INSERT INTO api_usage (provider, day, requests) VALUES (%s, %s, %s)
+                        ON CONFLICT (provider, day) DO UPDATE SET requests = api_usage.requests + EXCLUDED.requests
+                    """, (provider, day, requests))
+                else:
+                    cursor.execute("""
+                        INSERT INTO api_usage (provider, day, requests) VALUES (?, ?, ?)
+                        ON CONFLICT (provider, day) DO UPDATE SET requests = requests + excluded.requests
+                    """, (provider, day, requests))
+        except Exception as e:
+            logger.error(f"Errore registrazione utilizzo API: {e}")
+
+    def get_domain_health(self) -> List[Dict]:
+        """
+        Stato di salute dei domini scrapati
+
+        Returns:
+            Lista di dizionari con le colonne di domain_health (timestamp come datetime UTC)
+            e success_rate
+        """
+        try:
+            with self.connection() as conn:
+                cursor = self._dict_cursor(conn)
+                cursor.execute("SELECT * FROM domain_health ORDER BY domain")
+                rows = [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Errore lettura salute domini: {e}")
+            return []
+
+        for row in rows:
+            # SQLite restituisce stringhe ISO, PostgreSQL oggetti datetime
+            for column in ('last_error_at', 'open_until'):
+                if isinstance(row[column], str):
+                    row[column] = datetime.fromisoformat(row[column])
+            row['success_rate'] = 1 - row['failures'] / row['requests'] if row['requests'] else None
+        return rows
+
+    def save_domain_health(self, records: List[Dict]):
+        """
+        Aggiorna domain_health
+
+        Args:
+            records: Dizionari con domain, requests e failures (incrementi da sommare),
+                     consecutive_failures, latency_p50_ms, latency_p95_ms, last_error,
+                     last_error_at e open_until (valori correnti)
+        """
+        if not records:
+            return
+
+        p = '%s' if self.use_postgres else '?'
+
+        def timestamp(value):
+            if value is None or self.use_postgres:
+                return value
+            return value.isoformat(timespec='seconds')
+
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(f"""
+                    INSERT INTO domain_health (domain, requests, failures, consecutive_failures,
+                                               latency_p50_ms, latency_p95_ms, last_error,
+                                               last_error_at, open_until, updated_at)
+                    VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p}, {p}, CURRENT_TIMESTAMP)
+                    ON CONFLICT (domain) DO UPDATE SET
+                        requests = domain_health.requests + excluded.requests,
+                        failures = domain_health.failures + excluded.failures,
+                        consecutive_failures = excluded.consecutive_failures,
+                        latency_p50_ms = COALESCE(excluded.latency_p50_ms, domain_health.latency_p50_ms),
+                        latency_p95_ms = COALESCE(excluded.latency_p95_ms, domain_health.latency_p95_ms),
+                        last_error = COALESCE(excluded.last_error, domain_health.last_error),
+                        last_error_at = COALESCE(excluded.last_error_at, domain_health.last_error_at),
+                        open_until = excluded.open_until,
+                        updated_at = excluded.updated_at
+                """, [(r['domain'], r['requests'], r['failures'], r['consecutive_failures'],
+                       r['latency_p50_ms'], r['latency_p95_ms'], r['last_error'],
+                       timestamp(r['last_error_at']), timestamp(r['open_until'])) for r in records])
+        except Exception as e:
+            logger.error(f"Errore salvataggio salute domini: {e}")
 
     def get_articles_to_scrape(self, limit: int = 100) -> List[Dict]:
-        """Ottiene gli articoli che non hanno ancora il testo completo"""
-        conn = self.get_connection()
+        """
+        Ottiene gli articoli da scrapare adesso (nuovi o con il retry scaduto)
 
-        if self.use_postgres:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("""
+        Non li prende in carico: per lo scraping si veda claim_articles.
+        """
+        placeholder = '%s' if self.use_postgres else '?'
+
+        with self.connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f"""
                 SELECT id, url, title, source_name
                 FROM news
-                WHERE scraping_status = 'pending'
+                WHERE {SCRAPE_DUE}
                 ORDER BY published_at DESC
-                LIMIT %s
+                LIMIT {placeholder}
             """, (limit,))
-            articles = [dict(row) for row in cursor.fetchall()]
-        else:
-            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _seconds_from_now(self) -> str:
+        """Espressione SQL 'adesso + N secondi' (N è un parametro della query)"""
+        if self.use_postgres:
+            return "CURRENT_TIMESTAMP + %s * INTERVAL '1 second'"
+        return "datetime('now', '+' || ? || ' seconds')"
+
+    def claim_articles(self, worker_id: str, limit: int = 50, lease_seconds: int = 300,
+                       max_attempts: int = 5) -> List[Dict]:
+        """
+        Prende in carico articoli da scrapare per un worker (coda con lease)
+
+        Sono disponibili gli articoli 'pending' senza lease o con lease scaduto
+        e, se in attesa di retry, con next_attempt_at già passato.
+        Con PostgreSQL le righe sono bloccate con FOR UPDATE SKIP LOCKED, quindi
+        worker concorrenti ricevono articoli diversi senza attendersi; con SQLite
+        la presa in carico è un unico UPDATE atomico.
+
+        Args:
+            worker_id: Identificativo univoco del worker
+            limit: Numero massimo di articoli
+            lease_seconds: Durata del lease (va rinnovato con renew_leases)
+            max_attempts: Prese in carico oltre le quali un articolo il cui lease
+                          è scaduto (worker terminato durante lo scraping) è marcato 'failed'
+
+        Returns:
+            Lista di dizionari con id, url, title, source_name, scrape_attempts
+        """
+        p = '%s' if self.use_postgres else '?'
+        lock = 'FOR UPDATE SKIP LOCKED' if self.use_postgres else ''
+
+        with self.connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f"""
+                UPDATE news
+                SET scraping_status = 'failed', scraping_error = 'Lease expired too many times', {RELEASE_LEASE}
+                WHERE {SCRAPE_DUE} AND scrape_attempts >= {p}
+            """, (max_attempts,))
+            if cursor.rowcount:
+                logger.warning(f"Scrape queue: {cursor.rowcount} abandoned articles marked as failed")
+
+            cursor.execute(f"""
+                UPDATE news
+                SET lease_owner = {p},
+                    lease_expires_at = {self._seconds_from_now()},
+                    scrape_attempts = scrape_attempts + 1
+                WHERE id IN (
+                    SELECT id FROM news
+                    WHERE {SCRAPE_DUE}
+                    ORDER BY published_at DESC
+                    LIMIT {p}
+                    {lock}
+                )
+                RETURNING id, url, title, source_name, scrape_attempts
+            """, (worker_id, lease_seconds, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def renew_leases(self, worker_id: str, lease_seconds: int = 300) -> int:
+        """
+        Rinnova i lease di tutti gli articoli in lavorazione presso un worker (heartbeat)
+
+        Returns:
+            Numero di lease rinnovati
+        """
+        p = '%s' if self.use_postgres else '?'
+        with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, url, title, source_name
-                FROM news
-                WHERE scraping_status = 'pending'
-                ORDER BY published_at DESC
-                LIMIT ?
-            """, (limit,))
-            articles = [dict(row) for row in cursor.fetchall()]
+            cursor.execute(f"""
+                UPDATE news SET lease_expires_at = {self._seconds_from_now()}
+                WHERE lease_owner = {p} AND scraping_status = 'pending'
+            """, (lease_seconds, worker_id))
+            return cursor.rowcount
+
+    def release_leases(self, worker_id: str) -> int:
+        """
+        Restituisce alla coda gli articoli di un worker non ancora scrapati
 
-        conn.close()
-        return articles
+        La presa in carico non conta come tentativo, dato che lo scraping non è avvenuto.
+
+        Returns:
+            Numero di articoli rilasciati
+        """
+        p = '%s' if self.use_postgres else '?'
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE news SET {RELEASE_LEASE}, scrape_attempts = scrape_attempts - 1
+                WHERE lease_owner = {p} AND scraping_status = 'pending'
+            """, (worker_id,))
+            return cursor.rowcount
 
     def get_statistics(self) -> Dict:
-        """Ottiene statistiche sul database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Ottiene statistiche sul database (lette da news_stats, senza COUNT(*) su news)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT source_name, scraping_status, articles FROM news_stats WHERE articles > 0")
+            rows = cursor.fetchall()
 
-        stats = {}
+        by_status = {}
+        by_source = {}
+        for source_name, status, articles in rows:
+            by_status[status] = by_status.get(status, 0) + articles
+            by_source[source_name or None] = by_source.get(source_name or None, 0) + articles
 
-        # Totale articoli
-        cursor.execute("SELECT COUNT(*) FROM news")
-        stats['total_articles'] = cursor.fetchone()[0]
+        return {
+            'total_articles': sum(by_status.values()),
+            'scraped_articles': by_status.get('completed', 0),
+            'pending_scraping': by_status.get('pending', 0),
+            'failed_scraping': by_status.get('failed', 0),
+            # Fonti principali
+            'top_sources': dict(sorted(by_source.items(), key=lambda item: item[1], reverse=True)[:10]),
+        }
 
-        # Articoli con testo completo
-        cursor.execute("SELECT COUNT(*) FROM news WHERE scraping_status = 'completed'")
-        stats['scraped_articles'] = cursor.fetchone()[0]
+    def get_sources(self) -> List[str]:
+        """Fonti presenti nel database, in ordine alfabetico"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT source_name FROM news_stats
+                WHERE source_name != '' AND articles > 0
+                ORDER BY source_name
+            """)
+            return [row[0] for row in cursor.fetchall()]
 
-        # Articoli in attesa di scraping
-        cursor.execute("SELECT COUNT(*) FROM news WHERE scraping_status = 'pending'")
-        stats['pending_scraping'] = cursor.fetchone()[0]
+    def iter_articles_for_analysis(self, since: Optional[datetime] = None,
+                                   until: Optional[datetime] = None,
+                                   chunk_size: int = 500) -> Iterator[Dict]:
+        """
+        Articoli con testo completo, letti a blocchi senza caricarli tutti in memoria
 
-        # Articoli con errore
-        cursor.execute("SELECT COUNT(*) FROM news WHERE scraping_status = 'failed'")
-        stats['failed_scraping'] = cursor.fetchone()[0]
+        PostgreSQL usa un cursore lato server (named cursor), SQLite fetchmany.
+        La connessione resta occupata finché il generatore non è esaurito o chiuso.
 
-        # Fonti principali
-        cursor.execute("""
-            SELECT source_name, COUNT(*) as count
-            FROM news
-            GROUP BY source_name
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        stats['top_sources'] = dict(cursor.fetchall())
+        Args:
+            since: Solo articoli scrapati da questo istante in poi (UTC, incluso)
+            until: Solo articoli scrapati prima di questo istante (UTC, escluso)
+            chunk_size: Righe lette dal database per volta
+
+        Yields:
+            Dizionari con i dati dell'articolo, 'full_text' decompresso e 'scraped_at',
+            in ordine di scraping
+        """
+        p = '%s' if self.use_postgres else '?'
+        conditions = ["n.scraping_status = 'completed'"]
+        params = []
+        for bound, op in ((since, '>='), (until, '<')):
+            if bound is not None:
+                conditions.append(f"b.scraped_at {op} {p}")
+                # SQLite confronta testi: stesso formato di CURRENT_TIMESTAMP
+                params.append(bound if self.use_postgres else bound.strftime('%Y-%m-%d %H:%M:%S'))
+
+        sql = f"""
+            SELECT
+                n.id, n.url, n.title, n.source_name, n.author, n.published_at,
+                n.description, b.body, n.keywords_matched, n.fetched_at, b.scraped_at
+            FROM news n
+            JOIN news_body b ON b.news_id = n.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY b.scraped_at, n.id
+        """
+
+        with self.connection() as conn:
+            if self.use_postgres:
+                cursor = conn.cursor(name='export_articles', cursor_factory=RealDictCursor)
+                cursor.itersize = chunk_size
+            else:
+                cursor = self._dict_cursor(conn)
+            cursor.execute(sql, params)
 
-        conn.close()
-        return stats
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        article = dict(row)
+                        article['full_text'] = decompress_text(article.pop('body'))
+                        yield article
+            finally:
+                cursor.close()
 
     def export_for_analysis(self, output_format: str = 'list') -> List[Dict]:
         """
         Esporta tutti gli articoli con testo completo per l'analisi
 
+        Carica tutto in memoria: per corpus grandi usare iter_articles_for_analysis
+        o exporter.export_articles.
+
         Args:
             output_format: 'list' per lista di dict, 'dataframe' per pandas
 
         Returns:
             Lista di dizionari con i dati degli articoli
         """
-        conn = self.get_connection()
+        return list(self.iter_articles_for_analysis())
 
-        if self.use_postgres:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+    def _keyset_segment(self, cursor, source: Optional[str], dated: bool,
+                        position, ascending: bool, limit: int) -> List[Dict]:
+        """
+        Legge una pagina da uno dei due segmenti dell'ordinamento
+
+        Gli articoli con published_at valorizzato vengono prima (published_at, id
+        decrescenti), quelli senza data dopo (id decrescente). Ogni segmento è una
+        scansione di intervallo sull'indice, qualunque sia la profondità.
+        """
+        p = '%s' if self.use_postgres else '?'
+        conditions = ['n.published_at IS NOT NULL' if dated else 'n.published_at IS NULL']
+        params = []
+
+        if source:
+            conditions.append(f'n.source_name = {p}')
+            params.append(source)
+
+        if position is not None:
+            op = '>' if ascending else '<'
+            if dated:
+                conditions.append(f'(n.published_at, n.id) {op} ({p}, {p})')
+                params.extend(position)
+            else:
+                conditions.append(f'n.id {op} {p}')
+                params.append(position[1])
+
+        order = 'ASC' if ascending else 'DESC'
+        order_by = f'n.published_at {order}, n.id {order}' if dated else f'n.id {order}'
+        params.append(limit)
+
+        cursor.execute(f"""
+            SELECT {LIST_COLUMNS}
+            FROM news n
+            LEFT JOIN news_body b ON b.news_id = n.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order_by}
+            LIMIT {p}
+        """, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def list_articles(self, source: Optional[str] = None, after: Optional[str] = None,
+                      before: Optional[str] = None, limit: int = 20) -> Dict:
+        """
+        Pagina di articoli dal più recente, con paginazione a cursore (keyset)
+
+        A differenza di LIMIT/OFFSET il costo non cresce con la profondità della pagina.
+
+        Args:
+            source: Filtra per fonte (opzionale)
+            after: Token `next_cursor` di una pagina precedente (pagina successiva)
+            before: Token `prev_cursor` di una pagina successiva (pagina precedente)
+            limit: Articoli per pagina
+
+        Returns:
+            Dizionario con 'articles', 'next_cursor' e 'prev_cursor' (None se non ci sono altre pagine)
+        """
+        token = before or after
+        position = decode_cursor(token) if token else None
+        backwards = bool(before) and position is not None
+
+        # Un articolo in più per sapere se esiste un'altra pagina nella stessa direzione
+        wanted = limit + 1
+        with self.connection() as conn:
+            cursor = self._dict_cursor(conn)
+
+            if backwards:
+                # Verso gli articoli più recenti: prima i non datati con id maggiore, poi i datati
+                dated_position = position if position[0] is not None else None
+                rows = []
+                if position[0] is None:
+                    rows = self._keyset_segment(cursor, source, False, position, True, wanted)
+                if len(rows) < wanted:
+                    rows += self._keyset_segment(cursor, source, True, dated_position, True,
+                                                 wanted - len(rows))
+            else:
+                rows = []
+                if position is None or position[0] is not None:
+                    rows = self._keyset_segment(cursor, source, True, position, False, wanted)
+                if len(rows) < wanted:
+                    null_position = position if position is not None and position[0] is None else None
+                    rows += self._keyset_segment(cursor, source, False, null_position, False,
+                                                 wanted - len(rows))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+
+        first, last = (rows[0], rows[-1]) if rows else (None, None)
+        if backwards:
+            next_cursor = encode_cursor(last['published_at'], last['id']) if rows else None
+            prev_cursor = encode_cursor(first['published_at'], first['id']) if has_more else None
         else:
-            conn.row_factory = sqlite3.Row
+            next_cursor = encode_cursor(last['published_at'], last['id']) if has_more else None
+            prev_cursor = encode_cursor(first['published_at'], first['id']) if rows and position else None
+
+        return {'articles': rows, 'next_cursor': next_cursor, 'prev_cursor': prev_cursor}
+
+    def count_articles(self, source: Optional[str] = None) -> int:
+        """Numero di articoli (opzionalmente di una sola fonte), letto da news_stats"""
+        with self.connection() as conn:
             cursor = conn.cursor()
+            if source:
+                p = '%s' if self.use_postgres else '?'
+                cursor.execute(f"SELECT COALESCE(SUM(articles), 0) FROM news_stats WHERE source_name = {p}",
+                               (source,))
+            else:
+                cursor.execute("SELECT COALESCE(SUM(articles), 0) FROM news_stats")
+            return cursor.fetchone()[0]
 
-        cursor.execute("""
-            SELECT
-                id, url, title, source_name, author, published_at,
-                description, full_text, keywords_matched, fetched_at
-            FROM news
-            WHERE scraping_status = 'completed' AND full_text IS NOT NULL
-            ORDER BY published_at DESC
-        """)
+    @staticmethod
+    def _fts5_query(text: str) -> str:
+        """
+        Converte il testo dell'utente in una query FTS5 sicura
+
+        Ogni parola diventa un prefisso tra virgolette ("tumor"* trova anche
+        "tumore", "tumori"); le parole sono in AND.
+        """
+        terms = [term.replace('"', '') for term in text.split()]
+        return ' '.join(f'"{term}"*' for term in terms if term)
 
-        articles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+    def _search_filters(self, query: str, source: Optional[str]):
+        """Clausola WHERE e parametri comuni a search() e count_search()"""
+        if self.use_postgres:
+            where = "search_vector @@ websearch_to_tsquery('italian', %s)"
+            params = [query]
+            if source:
+                where += " AND source_name = %s"
+                params.append(source)
+        elif self.fts_enabled:
+            where = "news_fts MATCH ?"
+            params = [self._fts5_query(query)]
+            if source:
+                where += " AND n.source_name = ?"
+                params.append(source)
+        else:
+            where = "(n.title LIKE ? OR n.description LIKE ?)"
+            params = [f'%{query}%', f'%{query}%']
+            if source:
+                where += " AND n.source_name = ?"
+                params.append(source)
+        return where, params
+
+    def search(self, query: str, source: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        Ricerca full-text su titolo, descrizione e testo completo
 
-        return articles
+        Args:
+            query: Testo cercato (su PostgreSQL accetta la sintassi websearch:
+                   "frase esatta", OR, -escluso)
+            source: Filtra per fonte (opzionale)
+            limit: Numero massimo di risultati
+            offset: Risultati da saltare
+
+        Returns:
+            Articoli ordinati per rilevanza (BM25 / ts_rank), con in più 'rank' e
+            'snippet' (estratto con i termini trovati tra HIGHLIGHT_START e HIGHLIGHT_END)
+        """
+        if not query or not query.strip():
+            return []
+        if not self.use_postgres and self.fts_enabled and not self._fts5_query(query):
+            return []
+
+        where, params = self._search_filters(query, source)
+
+        if self.use_postgres:
+            sql = f"""
+                SELECT n.*,
+                       ts_headline('italian', coalesce(n.description, n.title),
+                                   websearch_to_tsquery('italian', %s),
+                                   'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, '
+                                   'MaxWords=35, MinWords=15, MaxFragments=2') AS snippet
+                FROM (
+                    SELECT {LIST_COLUMNS},
+                           ts_rank(n.search_vector, websearch_to_tsquery('italian', %s)) AS rank
+                    FROM news n
+                    LEFT JOIN news_body b ON b.news_id = n.id
+                    WHERE {where}
+                    ORDER BY rank DESC, n.published_at DESC
+                    LIMIT %s OFFSET %s
+                ) n
+                ORDER BY n.rank DESC, n.published_at DESC
+            """
+            params = [query, query] + params + [limit, offset]
+        elif self.fts_enabled:
+            # Pesi BM25: titolo 10, descrizione 5, testo 1 (valori più bassi = più rilevanti)
+            sql = f"""
+                SELECT {LIST_COLUMNS},
+                       bm25(news_fts, 10.0, 5.0, 1.0) AS rank,
+                       snippet(news_fts, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 24) AS snippet
+                FROM news_fts
+                JOIN news n ON n.id = news_fts.rowid
+                LEFT JOIN news_body b ON b.news_id = n.id
+                WHERE {where}
+                ORDER BY rank, n.published_at DESC
+                LIMIT ? OFFSET ?
+            """
+            params += [limit, offset]
+        else:
+            sql = f"""
+                SELECT {LIST_COLUMNS}, 0 AS rank, NULL AS snippet
+                FROM news n
+                LEFT JOIN news_body b ON b.news_id = n.id
+                WHERE {where}
+                ORDER BY n.published_at DESC
+                LIMIT ? OFFSET ?
+            """
+            params += [limit, offset]
+
+        with self.connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def count_search(self, query: str, source: Optional[str] = None) -> int:
+        """Numero totale di risultati di search() (per la paginazione)"""
+        if not query or not query.strip():
+            return 0
+        if not self.use_postgres and self.fts_enabled and not self._fts5_query(query):
+            return 0
+
+        where, params = self._search_filters(query, source)
+
+        if self.use_postgres:
+            sql = f"SELECT COUNT(*) FROM news WHERE {where}"
+        elif self.fts_enabled:
+            sql = f"SELECT COUNT(*) FROM news_fts JOIN news n ON n.id = news_fts.rowid WHERE {where}"
+        else:
+            sql = f"SELECT COUNT(*) FROM news n WHERE {where}"
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0]
@@ -0,0 +1,201 @@
+"""
+Stato di salute dei domini e circuit breaker dello scraping
+Per ogni dominio si tengono richieste, errori, latenze recenti e ultimo errore.
+Dopo `failure_threshold` errori temporanei consecutivi (timeout, 5xx, 429...)
+il circuito si apre: gli articoli del dominio vengono rimandati senza scaricarli
+per `cooldown` secondi, poi una sola richiesta di prova decide se richiuderlo.
+Lo stato è salvato nella tabella domain_health, così vale anche tra esecuzioni.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """Il circuito del dominio è aperto: la richiesta non va eseguita"""
+
+    def __init__(self, domain: str, retry_after: float):
+        super().__init__(f"Circuito aperto per {domain}: nuovo tentativo tra {retry_after:.0f}s")
+        self.domain = domain
+        self.retry_after = retry_after
+
+
+class _DomainState:
+    """Contatori e stato del circuito di un dominio"""
+
+    def __init__(self, latency_window: int):
+        self.requests = 0  # Dall'ultimo salvataggio
+        self.failures = 0  # Dall'ultimo salvataggio
+        self.consecutive_failures = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.last_error = None
+        self.last_error_at = None
+        self.open_until = None  # Epoch; None = circuito chiuso
+        self.probing = False
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class DomainHealth:
+    """Circuit breaker per dominio, condiviso dai thread di download"""
+
+    def __init__(self, db=None, failure_threshold: int = 5, cooldown: float = 600.0,
+                 latency_window: int = 200):
+        """
+        Args:
+            db: Istanza di NewsDatabase dove leggere e salvare lo stato (None = solo in memoria)
+            failure_threshold: Errori temporanei consecutivi che aprono il circuito
+            cooldown: Secondi di circuito aperto prima della richiesta di prova
+            latency_window: Latenze recenti per dominio usate per p50/p95
+        """
+        self.db = db
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = max(0.0, cooldown)
+        self.latency_window = max(1, latency_window)
+        self._domains: Dict[str, _DomainState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, db, config: Dict) -> 'DomainHealth':
+        """Crea il circuit breaker dalla sezione `scraping` e carica lo stato salvato"""
+        scraping_config = config.get('scraping', {})
+        health = cls(
+            db,
+            failure_threshold=scraping_config.get('circuit_failure_threshold', 5),
+            cooldown=scraping_config.get('circuit_cooldown', 600.0),
+        )
+        health.load()
+        return health
+
+    def _state(self, domain: str) -> _DomainState:
+        state = self._domains.get(domain)
+        if state is None:
+            state = self._domains[domain] = _DomainState(self.latency_window)
+        return state
+
+    def load(self):
+        """Ripristina dal database errori consecutivi e circuiti aperti"""
+        if self.db is None:
+            return
+        with self._lock:
+            for record in self.db.get_domain_health():
+                state = self._state(record['domain'])
+                state.consecutive_failures = record['consecutive_failures']
+                open_until = record['open_until']
+                if open_until is not None:
+                    state.open_until = open_until.replace(tzinfo=timezone.utc).timestamp()
+
+    def before_request(self, domain: str):
+        """
+        Verifica che si possa scaricare dal dominio
+
+        Con il circuito aperto e il cooldown scaduto lascia passare una sola
+        richiesta di prova; le altre attendono il suo esito.
+
+        Raises:
+            CircuitOpen: se la richiesta va rimandata
+        """
+        with self._lock:
+            state = self._state(domain)
+            if state.open_until is None:
+                return
+            now = time.time()
+            if now < state.open_until:
+                raise CircuitOpen(domain, state.open_until - now)
+            if state.probing:
+                raise CircuitOpen(domain, self.cooldown)
+            state.probing = True
+        logger.info(f"Circuit half-open for {domain}: sending probe request")
+
+    def cancel_request(self, domain: str):
+        """
+        Annulla un before_request senza registrare un esito
+
+        Da chiamare quando non c'è un download da contare (es. risposta non
+        HTML): libera la richiesta di prova, se era questa.
+        """
+        with self._lock:
+            self._state(domain).probing = False
+
+    def record(self, domain: str, latency: float, error: Optional[str] = None, healthy: bool = True):
+        """
+        Registra l'esito di un download
+
+        Args:
+            domain: Dominio richiesto
+            latency: Durata del download in secondi
+            error: Messaggio di errore (None se riuscito)
+            healthy: False per gli errori che indicano un sito in difficoltà
+                     (temporanei); una risposta come 404 conta come sito sano
+        """
+        with self._lock:
+            state = self._state(domain)
+            state.requests += 1
+            state.latencies.append(latency * 1000)
+            if error:
+                state.last_error = error[:500]
+                state.last_error_at = time.time()
+
+            if healthy:
+                if state.open_until is not None:
+                    logger.info(f"Circuit closed for {domain}")
+                state.consecutive_failures = 0
+                state.open_until = None
+                state.probing = False
+                return
+
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.probing or (state.open_until is None
+                                 and state.consecutive_failures >= self.failure_threshold):
+                state.open_until = time.time() + self.cooldown
+                state.probing = False
+                logger.warning(f"Circuit open for {domain} after {state.consecutive_failures} "
+                               f"consecutive failures: skipping it for {self.cooldown:.0f}s")
+
+    def open_domains(self) -> List[str]:
+        """Domini con il circuito attualmente aperto"""
+        now = time.time()
+        with self._lock:
+            return sorted(domain for domain, state in self._domains.items()
+                          if state.open_until is not None and state.open_until > now)
+
+    def save(self):
+        """Salva sul database i contatori accumulati e lo stato dei circuiti"""
+        if self.db is None:
+            return
+
+        def as_datetime(epoch):
+            if epoch is None:
+                return None
+            return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+        with self._lock:
+            records = []
+            for domain, state in self._domains.items():
+                latencies = list(state.latencies)
+                records.append({
+                    'domain': domain,
+                    'requests': state.requests,
+                    'failures': state.failures,
+                    'consecutive_failures': state.consecutive_failures,
+                    'latency_p50_ms': _percentile(latencies, 0.5),
+                    'latency_p95_ms': _percentile(latencies, 0.95),
+                    'last_error': state.last_error,
+                    'last_error_at': as_datetime(state.last_error_at),
+                    'open_until': as_datetime(state.open_until),
+                })
+                state.requests = 0
+                state.failures = 0
+
+        self.db.save_domain_health(records)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Export in streaming degli articoli scrapati (JSONL, CSV, Parquet)
+
+Gli articoli sono letti a blocchi e scritti man mano, quindi la memoria usata
+non dipende dalla dimensione del corpus. Con `--since last` si esportano solo
+gli articoli scrapati dopo l'export precedente con lo stesso nome.
+
+Uso:
+    python exporter.py --output corpus.jsonl
+    python exporter.py --output nuovi.parquet --format parquet --since last
+    python exporter.py --output maggio.csv --format csv --since 2024-05-01
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from dateutil.parser import isoparse
+
+from database import NewsDatabase
+from main import load_config, setup_logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ['id', 'url', 'title', 'source_name', 'author', 'published_at',
+                  'description', 'full_text', 'keywords_matched', 'fetched_at', 'scraped_at']
+
+# Sorgente dei watermark degli export nella tabella fetch_watermarks
+WATERMARK_SOURCE = 'export'
+
+# Gli articoli scrapati negli ultimi secondi restano al prossimo export: una
+# transazione ancora aperta potrebbe scrivere un timestamp precedente all'export
+SAFETY_LAG = timedelta(seconds=5)
+
+
+def _plain(value):
+    """Valore serializzabile (datetime in formato ISO)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class JsonlSink:
+    """Un oggetto JSON per riga"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, article: Dict):
+        record = {column: _plain(article.get(column)) for column in EXPORT_COLUMNS}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    """CSV con intestazione, una riga per articolo"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=EXPORT_COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, article: Dict):
+        self._writer.writerow({column: _plain(article.get(column)) for column in EXPORT_COLUMNS})
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Parquet (richiede pyarrow), scritto un row group alla volta"""
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [(column, pa.int64() if column == 'id' else pa.string()) for column in EXPORT_COLUMNS]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        self._row_group_size = row_group_size
+        self._columns = {column: [] for column in EXPORT_COLUMNS}
+        self._rows = 0
+
+    def write(self, article: Dict):
+        for column in EXPORT_COLUMNS:
+            value = _plain(article.get(column))
+            self._columns[column].append(value if value is None or column == 'id' else str(value))
+        self._rows += 1
+        if self._rows >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.table(self._columns, schema=self._schema))
+            self._columns = {column: [] for column in EXPORT_COLUMNS}
+            self._rows = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+SINKS = {
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+}
+
+
+def export_articles(db: NewsDatabase, path: str, output_format: str = 'jsonl',
+                    since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    chunk_size: int = 500) -> int:
+    """
+    Esporta gli articoli scrapati in streaming
+
+    Il file viene scritto con un nome temporaneo e rinominato solo a export
+    completato, così un errore non lascia un file parziale.
+
+    Args:
+        db: Database sorgente
+        path: File di destinazione
+        output_format: 'jsonl', 'csv' o 'parquet'
+        since: Solo articoli scrapati da questo istante (UTC, incluso)
+        until: Solo articoli scrapati prima di questo istante (UTC, escluso)
+        chunk_size: Righe lette dal database per volta
+
+    Returns:
+        Numero di articoli esportati
+    """
+    if output_format not in SINKS:
+        raise ValueError(f"Unknown export format: {output_format}")
+
+    tmp_path = f"{path}.tmp"
+    sink = SINKS[output_format](tmp_path)
+    count = 0
+
+    try:
+        for article in db.iter_articles_for_analysis(since=since, until=until, chunk_size=chunk_size):
+            sink.write(article)
+            count += 1
+        sink.close()
+    except BaseException:
+        sink.close()
+        os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export in streaming degli articoli scrapati")
+    parser.add_argument('--output', required=True, help="File di destinazione")
+    parser.add_argument('--format', choices=sorted(SINKS), default=None,
+                        help="Formato (default: dall'estensione del file, altrimenti jsonl)")
+    parser.add_argument('--since', default=None,
+                        help="Solo articoli scrapati da questa data ISO (UTC), "
+                             "oppure 'last' per riprendere dall'export precedente")
+    parser.add_argument('--name', default=None,
+                        help="Nome del watermark dell'export (default: nome del file)")
+    parser.add_argument('--config', default='config.yaml', help="File di configurazione")
+    args = parser.parse_args()
+
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if output_format not in SINKS:
+        output_format = 'jsonl'
+    name = args.name or os.path.basename(args.output)
+
+    config = load_config(args.config)
+    setup_logging(config)
+    db = NewsDatabase(config['database']['path'], config['database'])
+
+    try:
+        if args.since == 'last':
+            since = db.get_watermarks(WATERMARK_SOURCE).get(name)
+            logger.info(f"Incremental export '{name}' since {since or 'the beginning'}")
+        elif args.since:
+            since = isoparse(args.since)
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        else:
+            since = None
+
+        until = datetime.now(timezone.utc).replace(tzinfo=None) - SAFETY_LAG
+        count = export_articles(db, args.output, output_format, since=since, until=until)
+
+        # Il prossimo `--since last` riparte esattamente da dove si è fermato questo export
+        db.update_watermarks(WATERMARK_SOURCE, {name: until})
+        logger.info(f"Exported {count} articles to {args.output} ({output_format})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
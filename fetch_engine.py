@@ -0,0 +1,108 @@
+"""
+Motore di fetch concorrente per OncoNews
+Esegue le diverse fonti (News API, Google News, Reddit) in parallelo,
+rispettando un limite di richieste simultanee per ogni host
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Limiti di default: News API e Reddit restano sequenziali come da loro regole,
+# Google News RSS tollera qualche richiesta in parallelo
+DEFAULT_HOST_CONCURRENCY = {
+    'newsapi.org': 1,
+    'news.google.com': 4,
+    'www.reddit.com': 1,
+}
+
+
+class HostLimiter:
+    """Limita il numero di richieste simultanee verso lo stesso host"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = 2):
+        self.limits = dict(DEFAULT_HOST_CONCURRENCY)
+        self.limits.update(limits or {})
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, host: str) -> int:
+        """Restituisce il numero massimo di richieste simultanee per un host"""
+        return max(1, int(self.limits.get(host, self.default_limit)))
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit_for(host))
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, host: str):
+        """Context manager che occupa uno slot di concorrenza per l'host"""
+        semaphore = self._semaphore(host)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+class FetchEngine:
+    """Esegue i fetcher in parallelo con un thread pool limitato"""
+
+    def __init__(self, config: Dict):
+        fetch_config = config.get('fetching', {}) or {}
+        self.max_workers = fetch_config.get('max_workers', 3)
+        self.host_limiter = HostLimiter(
+            fetch_config.get('host_concurrency'),
+            fetch_config.get('default_host_concurrency', 2)
+        )
+
+    def run_sources(self, sources: Dict[str, Callable[[], List[Dict]]]) -> Dict[str, List[Dict]]:
+        """
+        Esegue le fonti in parallelo
+
+        Args:
+            sources: Dizionario {nome fonte: funzione senza argomenti che restituisce gli articoli}
+
+        Returns:
+            Dizionario {nome fonte: articoli} nello stesso ordine di `sources`.
+            Una fonte fallita restituisce lista vuota senza bloccare le altre.
+        """
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as executor:
+            futures = {name: executor.submit(fetch) for name, fetch in sources.items()}
+
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result() or []
+                except Exception as e:
+                    logger.error(f"{name} failed: {e}")
+                    results[name] = []
+
+        return results
+
+    def map_host(self, host: str, func: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """
+        Applica `func` a ogni elemento in parallelo, senza superare il limite dell'host
+
+        Args:
+            host: Host verso cui vengono fatte le richieste
+            func: Funzione da applicare a ogni elemento
+            items: Elementi da processare
+
+        Returns:
+            Risultati nello stesso ordine degli elementi in input
+        """
+        def run(item):
+            with self.host_limiter.slot(host):
+                return func(item)
+
+        workers = min(self.host_limiter.limit_for(host), len(items)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'fetch-{host}') as executor:
+            return list(executor.map(run, items))
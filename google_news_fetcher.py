@@ -2,39 +2,59 @@
 """
 Google News RSS Fetcher - Estrae notizie da Google News via RSS
 """
-import requests
+import re
+import math
+import hashlib
 import feedparser
 import logging
-from typing import List, Dict
-from datetime import datetime
-from urllib.parse import quote_plus
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import quote_plus, urlparse
+
+from http_client import get_client
 
 logger = logging.getLogger(__name__)
 
+# Estrae i <guid> degli item senza fare il parsing completo del feed
+GUID_PATTERN = re.compile(rb'<guid[^>]*>(.*?)</guid>', re.DOTALL)
+
 
 class GoogleNewsFetcher:
     """Fetcher per Google News tramite RSS"""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, db=None):
+        """
+        Args:
+            config: Configurazione
+            db: NewsDatabase opzionale, usato come cache dei validatori dei feed
+                (richieste condizionali ETag/Last-Modified)
+        """
         self.config = config
+        self.db = db
         self.base_url = "https://news.google.com/rss/search"
         self.language = "it"
         self.country = "IT"
+        self.http = get_client(config)
 
-    def fetch_keyword(self, keyword: str, max_results: int = 100) -> List[Dict]:
+    def fetch_keyword(self, keyword: str, max_results: int = 100,
+                      since: Optional[datetime] = None) -> Tuple[List[Dict], Optional[Dict]]:
         """
         Recupera articoli da Google News per una keyword
 
         Args:
             keyword: Keyword di ricerca
             max_results: Numero massimo di risultati
+            since: Ignora gli articoli pubblicati prima di questa data (UTC)
 
         Returns:
-            Lista di articoli normalizzati
+            (articoli normalizzati, validatori del feed). I validatori vanno salvati
+            con save_validators solo dopo aver inserito gli articoli nel database:
+            salvati prima, un errore farebbe perdere gli articoli (il feed
+            risulterebbe invariato al run successivo). None se non c'è nulla da salvare.
         """
         try:
-            # Costruisci query
-            query = f"{keyword} when:7d"  # Ultimi 7 giorni
+            # Costruisci query: finestra di giorni interi dal watermark (max 7)
+            query = f"{keyword} when:{self._when_days(since)}d"
             encoded_query = quote_plus(query)
 
             # URL RSS Google News
@@ -42,21 +62,92 @@ class GoogleNewsFetcher:
 
             logger.debug(f"Fetching Google News RSS: {keyword}")
 
-            # Parse RSS feed
-            feed = feedparser.parse(rss_url)
+            validators = self.db.get_feed_validators(rss_url) if self.db else None
+
+            # Richiesta condizionale: se il feed non è cambiato Google risponde 304
+            headers = {}
+            if validators:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+
+            response = self.http.get(rss_url, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"Google News: feed unchanged (304) for '{keyword}'")
+                return [], None
+            response.raise_for_status()
+
+            # Stessi entry dell'ultimo run: nessun parsing necessario (e nessun articolo da inserire)
+            digest = self._entries_digest(response.content)
+            if validators and digest and digest == validators.get('entries_digest'):
+                logger.info(f"Google News: feed entries unchanged for '{keyword}'")
+                self.save_validators([self._validators(rss_url, response, digest)])
+                return [], None
+
+            feed = feedparser.parse(response.content)
 
             articles = []
             for entry in feed.entries[:max_results]:
                 article = self._normalize_entry(entry, keyword)
-                if article:
-                    articles.append(article)
+                if not article:
+                    continue
+                # Già visto in un run precedente: inutile farlo scartare al database
+                if since and article['publishedAt'] and datetime.fromisoformat(article['publishedAt']) < since:
+                    continue
+                articles.append(article)
 
             logger.info(f"Google News: {len(articles)} articles for '{keyword}'")
-            return articles
+            return articles, self._validators(rss_url, response, digest)
 
         except Exception as e:
             logger.error(f"Error fetching Google News for '{keyword}': {e}")
-            return []
+            return [], None
+
+    @staticmethod
+    def _when_days(since: Optional[datetime], max_days: int = 7) -> int:
+        """Giorni da passare all'operatore when: di Google News"""
+        if since is None:
+            return max_days
+        elapsed = datetime.utcnow() - since
+        return min(max_days, max(1, math.ceil(elapsed / timedelta(days=1))))
+
+    @staticmethod
+    def _entries_digest(content: bytes) -> Optional[str]:
+        """
+        Calcola un digest degli ID degli entry del feed
+
+        Args:
+            content: Corpo della risposta RSS
+
+        Returns:
+            Hash SHA-1 dei <guid> in ordine, o None se il feed non ne contiene
+        """
+        guids = GUID_PATTERN.findall(content)
+        if not guids:
+            return None
+        return hashlib.sha1(b'\n'.join(g.strip() for g in guids)).hexdigest()
+
+    @staticmethod
+    def _validators(rss_url: str, response, digest: Optional[str]) -> Dict:
+        """ETag, Last-Modified e digest di una risposta, per la prossima richiesta condizionale"""
+        return {
+            'feed_url': rss_url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'entries_digest': digest,
+        }
+
+    def save_validators(self, validators: List[Dict]):
+        """
+        Memorizza i validatori dei feed (restituiti da fetch_keyword / fetch_all_keywords)
+
+        Da chiamare dopo che gli articoli dei feed sono stati inseriti nel database.
+        """
+        if not self.db:
+            return
+        for v in validators:
+            self.db.save_feed_validators(v['feed_url'], v['etag'], v['last_modified'], v['entries_digest'])
 
     def _normalize_entry(self, entry, keyword: str) -> Dict:
         """
@@ -104,25 +195,44 @@ class GoogleNewsFetcher:
             logger.debug(f"Error normalizing Google News entry: {e}")
             return None
 
-    def fetch_all_keywords(self, keywords: List[str], max_per_keyword: int = 50) -> List[Dict]:
+    def fetch_all_keywords(self, keywords: List[str], max_per_keyword: int = 50,
+                           engine=None, since: Optional[Dict[str, datetime]] = None
+                           ) -> Tuple[List[Dict], List[Dict]]:
         """
         Recupera articoli per tutte le keywords
 
         Args:
             keywords: Lista di keywords
             max_per_keyword: Massimo risultati per keyword
+            engine: FetchEngine opzionale per scaricare i feed in parallelo
+                    (rispettando il limite di concorrenza di news.google.com)
+            since: Data di inizio per singola keyword (watermark)
 
         Returns:
-            Lista di tutti gli articoli (deduplica per URL)
+            (tutti gli articoli deduplicati per URL, validatori dei feed da salvare
+            con save_validators dopo l'inserimento degli articoli)
         """
         all_articles = []
+        all_validators = []
         seen_urls = set()
 
         logger.info(f"Starting Google News fetch for {len(keywords)} keywords")
 
-        for keyword in keywords:
-            articles = self.fetch_keyword(keyword, max_results=max_per_keyword)
+        since = since or {}
+
+        def fetch(keyword):
+            return self.fetch_keyword(keyword, max_results=max_per_keyword, since=since.get(keyword))
+
+        if engine is not None:
+            host = urlparse(self.base_url).netloc
+            results = engine.map_host(host, fetch, keywords)
+        else:
+            results = [fetch(kw) for kw in keywords]
 
+        # I risultati sono nell'ordine delle keywords: la deduplica resta deterministica
+        for articles, validators in results:
+            if validators:
+                all_validators.append(validators)
             # Deduplica
             for article in articles:
                 url = article['url']
@@ -131,4 +241,4 @@ class GoogleNewsFetcher:
                     all_articles.append(article)
 
         logger.info(f"Google News: Total {len(all_articles)} unique articles")
-        return all_articles
+        return all_articles, all_validators
@@ -0,0 +1,206 @@
+"""
+Archivio dell'HTML scaricato dallo scraping
+Le pagine sono salvate compresse, una sola volta per contenuto (chiave: SHA-256
+dell'HTML), in file segmento a sola aggiunta; un indice SQLite nella stessa
+cartella associa ogni URL al contenuto scaricato più di recente. Permette di
+rieseguire l'estrazione sugli articoli già scaricati senza accedere alla rete
+(vedi reextract.py).
+
+Formato di un record nel segmento:
+    MAGIC (4 byte) | SHA-256 (32 byte) | lunghezza del payload (uint32 big-endian) | payload zlib
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'OHA1'
+RECORD_HEADER = struct.Struct('>4s32sI')
+INDEX_FILE = 'index.sqlite'
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+
+
+def read_record(path: str, segment: str, offset: int) -> str:
+    """
+    Legge e decomprime un record di un segmento
+
+    Funzione di modulo perché possa essere eseguita in un ProcessPoolExecutor.
+
+    Args:
+        path: Cartella dell'archivio
+        segment: Nome del file segmento
+        offset: Posizione del record nel segmento
+
+    Returns:
+        HTML del record
+
+    Raises:
+        ValueError: se il record è danneggiato
+    """
+    with open(os.path.join(path, segment), 'rb') as f:
+        f.seek(offset)
+        magic, digest, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Invalid archive record at {segment}:{offset}")
+        data = zlib.decompress(f.read(length))
+    if hashlib.sha256(data).digest() != digest:
+        raise ValueError(f"Checksum mismatch at {segment}:{offset}")
+    return data.decode('utf-8')
+
+
+class HtmlArchive:
+    """Archivio content-addressed dell'HTML delle pagine scrapate"""
+
+    def __init__(self, path: str, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 compression_level: int = COMPRESSION_LEVEL):
+        """
+        Args:
+            path: Cartella dell'archivio (creata se non esiste)
+            segment_size: Byte oltre i quali si apre un nuovo file segmento
+            compression_level: Livello di compressione zlib (1-9)
+        """
+        self.path = path
+        self.segment_size = max(1, segment_size)
+        self.compression_level = compression_level
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_file = None
+        self._segments_opened = 0
+        self._index = sqlite3.connect(os.path.join(path, INDEX_FILE), check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode = WAL")
+        self._index.execute("PRAGMA busy_timeout = 5000")
+        self._index.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL
+            )
+        """)
+        self._index.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._index.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['HtmlArchive']:
+        """Crea l'archivio dalla sezione `archive` della configurazione (None se disattivato)"""
+        archive_config = config.get('archive') or {}
+        if not archive_config.get('enabled', False):
+            return None
+        return cls(
+            archive_config.get('path', 'html_archive'),
+            segment_size=archive_config.get('segment_size', DEFAULT_SEGMENT_SIZE),
+        )
+
+    def _open_segment(self):
+        """File segmento del processo corrente (un nuovo file a ogni rotazione)"""
+        if self._segment_file is not None and self._segment_file.tell() < self.segment_size:
+            return self._segment_file
+        if self._segment_file is not None:
+            self._segment_file.close()
+        # Ogni processo scrive solo nei propri segmenti: nessun lock tra processi
+        self._segments_opened += 1
+        self._segment = f"segment-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self._segments_opened:04d}.dat"
+        self._segment_file = open(os.path.join(self.path, self._segment), 'ab')
+        return self._segment_file
+
+    def put(self, url: str, html: str) -> str:
+        """
+        Archivia l'HTML di un URL (il contenuto è scritto solo se non già presente)
+
+        Returns:
+            Hash SHA-256 del contenuto
+        """
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data)
+        key = digest.hexdigest()
+
+        with self._lock:
+            exists = self._index.execute("SELECT 1 FROM blobs WHERE hash = ?", (key,)).fetchone()
+            if not exists:
+                payload = zlib.compress(data, self.compression_level)
+                segment_file = self._open_segment()
+                offset = segment_file.tell()
+                segment_file.write(RECORD_HEADER.pack(MAGIC, digest.digest(), len(payload)))
+                segment_file.write(payload)
+                segment_file.flush()
+                self._index.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, segment, offset, size, stored_size) VALUES (?, ?, ?, ?, ?)",
+                    (key, self._segment, offset, len(data), len(payload))
+                )
+            self._index.execute("""
+                INSERT INTO urls (url, hash, archived_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (url) DO UPDATE SET hash = excluded.hash, archived_at = excluded.archived_at
+            """, (url, key))
+            self._index.commit()
+        return key
+
+    def get(self, url: str) -> Optional[str]:
+        """HTML archiviato per un URL (None se assente)"""
+        with self._lock:
+            row = self._index.execute("""
+                SELECT b.segment, b.offset FROM urls u JOIN blobs b ON b.hash = u.hash WHERE u.url = ?
+            """, (url,)).fetchone()
+        if row is None:
+            return None
+        return read_record(self.path, *row)
+
+    def iter_entries(self, since: Optional[str] = None) -> Iterator[Tuple[str, str, int]]:
+        """
+        Scorre gli URL archiviati in ordine di segmento e posizione (lettura sequenziale)
+
+        Args:
+            since: Solo URL archiviati da questo istante (UTC, 'YYYY-MM-DD HH:MM:SS')
+
+        Yields:
+            (url, segmento, offset)
+        """
+        # Connessione dedicata: il cursore resta aperto durante tutta l'iterazione
+        conn = sqlite3.connect(os.path.join(self.path, INDEX_FILE))
+        try:
+            query = "SELECT u.url, b.segment, b.offset FROM urls u JOIN blobs b ON b.hash = u.hash"
+            params = ()
+            if since:
+                query += " WHERE u.archived_at >= ?"
+                params = (since,)
+            yield from conn.execute(query + " ORDER BY b.segment, b.offset", params)
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        """
+        Dimensioni dell'archivio
+
+        Returns:
+            Dizionario con urls, blobs, html_bytes (non compressi) e stored_bytes
+        """
+        with self._lock:
+            urls = self._index.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            blobs, html_bytes, stored_bytes = self._index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        return {'urls': urls, 'blobs': blobs, 'html_bytes': html_bytes, 'stored_bytes': stored_bytes}
+
+    def close(self):
+        """Chiude il segmento corrente e l'indice"""
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            self._index.close()
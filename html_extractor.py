@@ -0,0 +1,228 @@
+"""
+Estrattore di testo basato su lxml
+Rimozione del boilerplate e scelta del contenuto principale in un'unica
+visita dell'albero DOM, con rilevamento del charset da header e meta tag
+"""
+import codecs
+import re
+from typing import Optional, Union
+
+import lxml.html
+from lxml import etree
+
+# Tag rimossi interamente (insieme a tutto il loro contenuto)
+SKIP_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'aside',
+                       'header', 'iframe', 'noscript'])
+
+# Sottostringhe di classi CSS di advertising/tracking da rimuovere
+BOILERPLATE_CLASSES = ('advertisement', 'ads', 'social-share', 'comments',
+                       'related-articles', 'sidebar', 'menu')
+
+# Sottostringhe di classi CSS del contenuto principale, in ordine di priorità
+CONTENT_CLASSES = ('article-body', 'article-content', 'post-content',
+                   'entry-content', 'content-body', 'main-content')
+
+CONTENT_TYPE_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Content-Type accettati dallo scraping (senza header la risposta è accettata)
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Inizio di un tag di apertura, commento o doctype
+TAG_START = re.compile(r'<[A-Za-z!]')
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    """Restituisce il nome del codec se Python lo conosce, altrimenti None"""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().lower()).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content: bytes, content_type: Optional[str] = None) -> Optional[str]:
+    """
+    Rileva il charset senza analizzare statisticamente tutto il corpo
+
+    Ordine: header Content-Type, BOM, <meta charset> / http-equiv nei primi 4 KB.
+
+    Args:
+        content: Corpo della risposta
+        content_type: Valore dell'header Content-Type (opzionale)
+
+    Returns:
+        Nome del codec o None se non dichiarato
+    """
+    if content_type:
+        match = CONTENT_TYPE_CHARSET.search(content_type)
+        charset = _valid_codec(match.group(1)) if match else None
+        if charset:
+            return charset
+
+    for bom, charset in BOMS:
+        if content.startswith(bom):
+            return charset
+
+    match = META_CHARSET.search(content[:4096])
+    if match:
+        return _valid_codec(match.group(1).decode('ascii', 'ignore'))
+
+    return None
+
+
+def decode_html(content: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Decodifica il corpo HTML usando il charset dichiarato
+
+    Se il charset non è dichiarato prova UTF-8 e ripiega su windows-1252,
+    la codifica più comune nelle pagine italiane non UTF-8.
+    """
+    charset = detect_charset(content, content_type)
+    if charset:
+        return content.decode(charset, errors='replace')
+
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content.decode('cp1252', errors='replace')
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """True se il Content-Type indica una pagina HTML (o manca)"""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def limit_dom(html: str, max_elements: int) -> str:
+    """
+    Tronca l'HTML dopo `max_elements` tag
+
+    Protegge il parsing (lxml e newspaper3k) da pagine enormi come i live blog:
+    il contenuto principale è di norma all'inizio del documento.
+
+    Args:
+        html: HTML decodificato
+        max_elements: Numero massimo di tag da mantenere (0 = nessun limite)
+
+    Returns:
+        L'HTML originale o il suo prefisso
+    """
+    # Controllo veloce: il numero di '<' è un limite superiore al numero di tag
+    if not max_elements or html.count('<') <= max_elements:
+        return html
+    for count, match in enumerate(TAG_START.finditer(html), 1):
+        if count > max_elements:
+            return html[:match.start()]
+    return html
+
+
+def _class_matches(classes, patterns) -> bool:
+    return any(pattern in cls for cls in classes for pattern in patterns)
+
+
+def extract_text(html: Union[str, bytes], content_type: Optional[str] = None,
+                 min_length: int = 100) -> Optional[str]:
+    """
+    Estrae il testo dei paragrafi del contenuto principale
+
+    Stessa logica dell'estrattore BeautifulSoup (rimozione di script/nav/ads,
+    poi <article>, poi classi di contenuto, poi <body>), ma con una sola visita
+    in preordine: i sottoalberi di boilerplate non vengono nemmeno visitati e per
+    ogni nodo si registra l'intervallo di preordine del suo sottoalbero, così i
+    paragrafi del contenuto principale si selezionano senza una seconda visita.
+
+    Args:
+        html: HTML come stringa o bytes
+        content_type: Header Content-Type (usato solo se html è bytes)
+        min_length: Lunghezza minima del testo per considerarlo valido
+
+    Returns:
+        Testo estratto o None
+    """
+    if isinstance(html, bytes):
+        html = decode_html(html, content_type)
+    if not html or not html.strip():
+        return None
+
+    try:
+        # Passando bytes UTF-8 si evitano errori sulle dichiarazioni <?xml encoding?>
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        root = lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+    boilerplate = []
+    paragraphs = []  # (indice di preordine, elemento)
+    article = None
+    content = {}
+    body = None
+    spans = {}  # elemento -> (inizio, fine) del sottoalbero in preordine
+
+    index = 0
+    stack = [(root, False)]
+    while stack:
+        element, leaving = stack.pop()
+        if leaving:
+            spans[element] = (spans[element][0], index)
+            continue
+
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Commenti e processing instruction
+            continue
+        tag = tag.lower()
+        classes = (element.get('class') or '').lower().split()
+
+        # <html> e <body> non sono mai boilerplate, anche con classi come 'has-sidebar'
+        if tag in SKIP_TAGS or (classes and tag not in ('html', 'body')
+                                and _class_matches(classes, BOILERPLATE_CLASSES)):
+            boilerplate.append(element)
+            continue
+
+        index += 1
+        if tag == 'p':
+            paragraphs.append((index, element))
+        elif tag == 'article':
+            if article is None:
+                article = element
+        elif tag == 'body' and body is None:
+            body = element
+
+        if classes:
+            for pattern in CONTENT_CLASSES:
+                if pattern not in content and _class_matches(classes, (pattern,)):
+                    content[pattern] = element
+
+        spans[element] = (index, None)
+        stack.append((element, True))
+        stack.extend((child, False) for child in reversed(element))
+
+    main_content = article
+    if main_content is None:
+        main_content = next((content[p] for p in CONTENT_CLASSES if p in content), None)
+    if main_content is None:
+        main_content = body if body is not None else root
+
+    # Stacca il boilerplate (anche se annidato nei paragrafi) prima di leggerne il testo
+    for element in boilerplate:
+        element.drop_tree()
+
+    start, end = spans[main_content]
+    texts = []
+    for position, paragraph in paragraphs:
+        if start <= position <= end:
+            text = ' '.join(paragraph.text_content().split())
+            if text:
+                texts.append(text)
+
+    text = ' '.join(' '.join(texts).split())
+    return text if len(text) > min_length else None
@@ -0,0 +1,165 @@
+"""
+Client HTTP condiviso per OncoNews
+Una sola requests.Session con pool di connessioni keep-alive per host,
+retry automatici e contatori sul riuso delle connessioni
+"""
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter che conta le richieste e le nuove connessioni aperte"""
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.requests_sent = 0
+        self.connections_opened = 0
+        super().__init__(*args, **kwargs)
+
+    def _track_pool(self, pool):
+        # Il pool urllib3 dell'host tiene il conto delle connessioni create:
+        # la differenza prima/dopo dice se la richiesta ha aperto un nuovo socket
+        self._local.pool = pool
+        self._local.opened_before = pool.num_connections
+        return pool
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        return self._track_pool(super().get_connection_with_tls_context(*args, **kwargs))
+
+    def get_connection(self, *args, **kwargs):
+        return self._track_pool(super().get_connection(*args, **kwargs))
+
+    def send(self, request, **kwargs):
+        self._local.pool = None
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            pool = self._local.pool
+            opened = pool.num_connections - self._local.opened_before if pool is not None else 0
+            with self._stats_lock:
+                self.requests_sent += 1
+                self.connections_opened += max(0, opened)
+
+
+class HttpClient:
+    """Sessione HTTP condivisa da fetcher e scraper"""
+
+    def __init__(self, config: Optional[Dict] = None, retries: bool = True):
+        """
+        Args:
+            config: Configurazione (sezione `scraping`)
+            retries: False per non ripetere automaticamente le richieste, es. verso
+                     API a quota dove ogni tentativo consuma una richiesta
+        """
+        scraping_config = (config or {}).get('scraping', {})
+
+        self.timeout = scraping_config.get('timeout', 30)
+        self.max_retries = scraping_config.get('max_retries', 3) if retries else 0
+        self.pool_connections = scraping_config.get('pool_connections', 20)
+        self.pool_maxsize = scraping_config.get('pool_maxsize', 10)
+        self.backoff_factor = scraping_config.get('backoff_factor', 1.0)
+
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = CountingHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+
+        # Ogni richiesta attende il proprio turno solo sul token bucket del suo host
+        self.rate_limiter = get_rate_limiter(config)
+
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({
+            'User-Agent': scraping_config.get('user_agent', DEFAULT_USER_AGENT),
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Esegue una GET sulla sessione condivisa
+
+        Args:
+            url: URL da richiedere
+            **kwargs: Parametri passati a requests (params, headers, timeout, ...)
+
+        Returns:
+            Risposta HTTP
+        """
+        self.rate_limiter.acquire(url)
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """
+        Statistiche sul riuso delle connessioni
+
+        Returns:
+            Dizionario con richieste, connessioni aperte e connessioni riusate
+        """
+        with self.adapter._stats_lock:
+            requests_sent = self.adapter.requests_sent
+            connections_opened = self.adapter.connections_opened
+
+        reused = max(0, requests_sent - connections_opened)
+        return {
+            'requests': requests_sent,
+            'connections_opened': connections_opened,
+            'connections_reused': reused,
+            'reuse_ratio': reused / requests_sent if requests_sent else 0.0
+        }
+
+    def close(self):
+        """Chiude tutte le connessioni del pool"""
+        self.session.close()
+
+
+_clients: Dict[bool, HttpClient] = {}
+_client_lock = threading.Lock()
+
+
+def get_client(config: Optional[Dict] = None, retries: bool = True) -> HttpClient:
+    """
+    Restituisce il client HTTP condiviso dal processo
+
+    La prima chiamata lo crea usando la sezione `scraping` della configurazione;
+    le chiamate successive restituiscono sempre la stessa istanza. Il client
+    senza retry (retries=False) è un'istanza separata, con il proprio pool.
+
+    Args:
+        config: Configurazione (usata solo alla prima chiamata)
+        retries: Se False, client che non ripete le richieste fallite
+
+    Returns:
+        Istanza condivisa di HttpClient
+    """
+    with _client_lock:
+        client = _clients.get(retries)
+        if client is None:
+            client = _clients[retries] = HttpClient(config, retries=retries)
+        return client
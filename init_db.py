@@ -38,6 +38,11 @@ def main():
         print()
         print("Tabelle create:")
         print("  - news (articoli)")
+        print("  - feed_cache (validatori feed Google News)")
+        print("  - fetch_watermarks (fetch incrementale)")
+        print("  - api_usage (quota giornaliera News API)")
+        print("  - news_stats (contatori per fonte e stato, aggiornati da trigger)")
+        print("  - domain_health (salute dei domini e circuit breaker dello scraping)")
         print("  - Indici per ottimizzazione query")
         print()
         print("Il database è pronto per ricevere dati.")
@@ -6,6 +6,7 @@ Script principale per il fetch e scraping giornaliero
 import os
 import sys
 import yaml
+import argparse
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -17,6 +18,14 @@ from content_scraper import ContentScraper
 from content_filter import ContentFilter
 from google_news_fetcher import GoogleNewsFetcher
 from reddit_fetcher import RedditFetcher
+from fetch_engine import FetchEngine
+from scrape_pool import ScrapeWorkerPool
+from domain_health import DomainHealth
+from html_archive import HtmlArchive
+from result_writer import ResultWriter
+from scrape_queue import ScrapeQueue
+from http_client import get_client
+from watermarks import collect_watermarks, compute_since
 
 
 def setup_logging(config: dict):
@@ -40,7 +49,8 @@ def load_config(config_path: str = 'config.yaml') -> dict:
         return yaml.safe_load(f)
 
 
-def fetch_news(api_key: str, config: dict, db: NewsDatabase, days_back: int = 1) -> int:
+def fetch_news(api_key: str, config: dict, db: NewsDatabase, days_back: int = 1,
+               full_refresh: bool = False) -> int:
     """
     Recupera le notizie da TUTTE le fonti: News API, Google News, Reddit
 
@@ -48,7 +58,8 @@ def fetch_news(api_key: str, config: dict, db: NewsDatabase, days_back: int = 1)
         api_key: Chiave API News API
         config: Configurazione
         db: Database instance
-        days_back: Quanti giorni indietro cercare
+        days_back: Quanti giorni indietro cercare (al massimo)
+        full_refresh: Se True ignora i watermark e ricarica tutti i `days_back` giorni
 
     Returns:
         Numero di nuovi articoli inseriti
@@ -61,38 +72,56 @@ def fetch_news(api_key: str, config: dict, db: NewsDatabase, days_back: int = 1)
     keywords = config['keywords']
     logger.info(f"Keywords configured: {len(keywords)}")
 
-    all_articles = []
+    from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+    engine = FetchEngine(config)
+
+    # Fetch incrementale: per ogni (fonte, keyword) si parte dall'ultimo articolo visto
+    overlap_hours = config.get('fetching', {}).get('watermark_overlap_hours', 6)
+
+    def since_for(source):
+        if full_refresh:
+            return None
+        return compute_since(db.get_watermarks(source), keywords, overlap_hours, days_back)
+
+    if full_refresh:
+        logger.info(f"Full refresh: ignoring watermarks, fetching last {days_back} days")
+
+    # Le tre fonti girano in parallelo: il tempo totale è quello della più lenta
+    def fetch_newsapi():
+        logger.info(">>> Fonte 1/3: News API")
+        fetcher = NewsFetcher(api_key, config, db=db)
+        articles = fetcher.fetch_all_keywords(keywords, from_date=from_date, since=since_for('newsapi'))
+        logger.info(f"News API: {len(articles)} articles")
+        return articles
+
+    google_fetcher = GoogleNewsFetcher(config, db=db)
+    feed_validators = []
+
+    def fetch_google_news():
+        logger.info(">>> Fonte 2/3: Google News RSS")
+        articles, validators = google_fetcher.fetch_all_keywords(keywords, max_per_keyword=30, engine=engine,
+                                                                 since=since_for('google_news'))
+        feed_validators.extend(validators)
+        logger.info(f"Google News: {len(articles)} articles")
+        return articles
+
+    def fetch_reddit():
+        logger.info(">>> Fonte 3/3: Reddit")
+        reddit_fetcher = RedditFetcher(config)
+        posts = reddit_fetcher.fetch_all_subreddits(keywords, since=since_for('reddit'))
+        logger.info(f"Reddit: {len(posts)} posts")
+        return posts
 
-    # FONTE 1: News API
-    try:
-        logger.info("\n>>> Fonte 1/3: News API")
-        fetcher = NewsFetcher(api_key, config)
-        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        newsapi_articles = fetcher.fetch_all_keywords(keywords, from_date=from_date)
-        logger.info(f"News API: {len(newsapi_articles)} articles")
-        all_articles.extend(newsapi_articles)
-    except Exception as e:
-        logger.error(f"News API failed: {e}")
+    results = engine.run_sources({
+        'newsapi': fetch_newsapi,
+        'google_news': fetch_google_news,
+        'reddit': fetch_reddit,
+    })
 
-    # FONTE 2: Google News
-    try:
-        logger.info("\n>>> Fonte 2/3: Google News RSS")
-        google_fetcher = GoogleNewsFetcher(config)
-        google_articles = google_fetcher.fetch_all_keywords(keywords, max_per_keyword=30)
-        logger.info(f"Google News: {len(google_articles)} articles")
-        all_articles.extend(google_articles)
-    except Exception as e:
-        logger.error(f"Google News failed: {e}")
-
-    # FONTE 3: Reddit
-    try:
-        logger.info("\n>>> Fonte 3/3: Reddit")
-        reddit_fetcher = RedditFetcher(config)
-        reddit_posts = reddit_fetcher.fetch_all_subreddits(keywords)
-        logger.info(f"Reddit: {len(reddit_posts)} posts")
-        all_articles.extend(reddit_posts)
-    except Exception as e:
-        logger.error(f"Reddit failed: {e}")
+    # Unisci nell'ordine fisso delle fonti, come nel fetch sequenziale
+    all_articles = []
+    for source, articles in results.items():
+        all_articles.extend(articles)
 
     logger.info(f"\nTotal articles from all sources: {len(all_articles)}")
 
@@ -102,12 +131,15 @@ def fetch_news(api_key: str, config: dict, db: NewsDatabase, days_back: int = 1)
 
     logger.info(f"After filtering: {len(filtered_articles)} articles kept, {len(rejected_articles)} rejected")
 
-    # Inserisci nel database solo articoli filtrati (deduplica per URL)
-    new_count = 0
-    for article in filtered_articles:
-        # Usa normalize_article se esiste il metodo, altrimenti usa l'articolo così com'è
-        if db.insert_article(article):
-            new_count += 1
+    # Inserisci nel database solo articoli filtrati (deduplica per URL, un'unica transazione)
+    new_urls = db.insert_articles(filtered_articles)
+    new_count = len(new_urls)
+
+    # Solo ora che gli articoli sono salvati: avanza i watermark con tutto ciò che è stato
+    # visto (anche se poi filtrato) e al prossimo run i feed invariati possono essere saltati
+    for source, articles in results.items():
+        db.update_watermarks(source, collect_watermarks(articles))
+    google_fetcher.save_validators(feed_validators)
 
     logger.info(f"New articles inserted into database: {new_count}")
     logger.info(f"Duplicates skipped: {len(filtered_articles) - new_count}")
@@ -132,39 +164,46 @@ def scrape_content(config: dict, db: NewsDatabase, max_articles: int = 100) -> i
     logger.info("FASE 2: SCRAPING TESTO COMPLETO")
     logger.info("=" * 60)
 
-    scraper = ContentScraper(config)
-
-    # Ottieni articoli da scrapare
-    articles = db.get_articles_to_scrape(limit=max_articles)
-    logger.info(f"Articles pending scraping: {len(articles)}")
-
-    if not articles:
-        logger.info("No articles to scrape")
-        return 0
-
-    # Scrape batch
-    success_count = 0
-    for i, article in enumerate(articles, 1):
-        url = article['url']
-        title = article['title']
-
-        logger.info(f"Processing {i}/{len(articles)}: {title[:60]}...")
-
-        result = scraper.scrape_article(url, title)
-
-        if result['success']:
-            db.update_full_text(url, result['text'], status='completed')
-            success_count += 1
-        else:
-            error_msg = result.get('error', 'Unknown error')
-            db.update_scraping_error(url, error_msg)
-            logger.warning(f"  Failed: {error_msg}")
-
-        # Pausa tra gli scraping per evitare rate limiting
-        if i < len(articles):
-            import time
-            time.sleep(2)
-
+    # Prendi in carico gli articoli da scrapare: altri processi (scrape_worker.py,
+    # un'altra esecuzione di main.py) non li riceveranno finché il lease è attivo
+    with ScrapeQueue.from_config(db, config) as scrape_queue:
+        articles = scrape_queue.claim(max_articles)
+        logger.info(f"Articles claimed for scraping: {len(articles)}")
+
+        if not articles:
+            logger.info("No articles to scrape")
+            return 0
+
+        # Con archive.enabled l'HTML scaricato è conservato per future riestrazioni (reextract.py)
+        archive = HtmlArchive.from_config(config)
+        try:
+            scraper = ContentScraper(config, archive=archive)
+
+            # Scrape in parallelo; un solo thread scrive i risultati sul database a blocchi.
+            # I domini che falliscono di continuo vengono saltati (circuit breaker)
+            health = DomainHealth.from_config(db, config)
+            pool = ScrapeWorkerPool(scraper, config, health)
+            success_count = 0
+
+            with ResultWriter.from_config(db, config) as writer:
+                for i, (article, result) in enumerate(pool.run(articles), 1):
+                    logger.info(f"Processed {i}/{len(articles)}: {article['title'][:60]}...")
+
+                    if result['success']:
+                        success_count += 1
+                    else:
+                        logger.warning(f"  Failed: {result.get('error', 'Unknown error')}")
+
+                    writer.submit(result)
+
+            health.save()
+        finally:
+            if archive is not None:
+                archive.close()
+
+    open_domains = health.open_domains()
+    if open_domains:
+        logger.warning(f"Domains skipped by the circuit breaker: {', '.join(open_domains)}")
     logger.info(f"Scraping completed: {success_count}/{len(articles)} successful")
     return success_count
 
@@ -189,8 +228,24 @@ def show_statistics(db: NewsDatabase):
             logger.info(f"  - {source}: {count}")
 
 
+def parse_args():
+    """Argomenti da riga di comando"""
+    parser = argparse.ArgumentParser(description="OncoNews - fetch e scraping notizie")
+    parser.add_argument(
+        '--full-refresh', action='store_true',
+        help="Ignora i watermark e ricarica tutti gli ultimi 7 giorni da ogni fonte"
+    )
+    parser.add_argument(
+        '--reconcile-stats', action='store_true',
+        help="Ricalcola la tabella riassuntiva news_stats dai dati di news ed esce"
+    )
+    return parser.parse_args()
+
+
 def main():
     """Funzione principale"""
+    args = parse_args()
+
     # Carica variabili d'ambiente
     load_dotenv()
 
@@ -204,6 +259,17 @@ def main():
     logger.info("=" * 60)
     logger.info(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
+    if args.reconcile_stats:
+        db = NewsDatabase(config['database']['path'], config['database'])
+        drift = db.reconcile_stats()
+        for (source, status), (stored, actual) in sorted(drift.items()):
+            logger.info(f"  {source or '(nessuna fonte)'} / {status or '(nessuno stato)'}: {stored} -> {actual}")
+        db.close()
+        return
+
+    # Client HTTP condiviso (pool keep-alive) per fetcher e scraper
+    http = get_client(config)
+
     # Verifica API key
     api_key = os.getenv('NEWS_API_KEY')
     if not api_key:
@@ -211,21 +277,21 @@ def main():
         logger.error("Please create a .env file with: NEWS_API_KEY=your_api_key")
         sys.exit(1)
 
-    # Valida API key
+    # Inizializza database
+    db_path = config['database']['path']
+    logger.info(f"Database: {db_path}")
+    db = NewsDatabase(db_path, config['database'])
+
+    # Valida API key (la richiesta conta nella quota giornaliera)
     logger.info("Validating News API key...")
-    if not NewsFetcher.validate_api_key(api_key):
+    if not NewsFetcher.validate_api_key(api_key, db=db, config=config):
         logger.error("ERROR: Invalid News API key")
         sys.exit(1)
     logger.info("API key validated successfully")
 
-    # Inizializza database
-    db_path = config['database']['path']
-    logger.info(f"Database: {db_path}")
-    db = NewsDatabase(db_path)
-
     try:
         # Fase 1: Fetch notizie
-        new_articles = fetch_news(api_key, config, db, days_back=7)
+        new_articles = fetch_news(api_key, config, db, days_back=7, full_refresh=args.full_refresh)
 
         # Fase 2: Scrape testo completo
         scraped_articles = scrape_content(config, db, max_articles=100)
@@ -237,11 +303,21 @@ def main():
         logger.info("COMPLETATO CON SUCCESSO")
         logger.info(f"  - Nuovi articoli trovati: {new_articles}")
         logger.info(f"  - Articoli scrapati: {scraped_articles}")
+        http_stats = http.get_stats()
+        logger.info(f"  - Richieste HTTP: {http_stats['requests']} "
+                    f"({http_stats['connections_reused']} su connessioni riusate, "
+                    f"{http_stats['connections_opened']} nuove connessioni)")
+        pool_stats = db.get_pool_stats()
+        logger.info(f"  - Connessioni database: {pool_stats['checkouts']} utilizzi, "
+                    f"{pool_stats['connections_opened']} aperte, "
+                    f"attesa max {pool_stats['wait_max_ms']:.1f} ms")
         logger.info("=" * 60)
 
     except Exception as e:
         logger.error(f"ERRORE CRITICO: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
@@ -5,7 +5,9 @@ import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
-import time
+
+from http_client import get_client
+from query_utils import build_or_queries, format_or_query, attribute_keywords
 
 logger = logging.getLogger(__name__)
 
@@ -13,98 +15,210 @@ logger = logging.getLogger(__name__)
 class NewsFetcher:
     """Gestisce il recupero delle notizie da News API"""
 
-    def __init__(self, api_key: str, config: Dict):
+    PROVIDER = 'newsapi'
+
+    def __init__(self, api_key: str, config: Dict, db=None):
+        """
+        Args:
+            api_key: Chiave API News API
+            config: Configurazione
+            db: NewsDatabase opzionale, usato per tenere il conto della quota giornaliera
+                tra un run e l'altro (senza database il conto vale solo per questa istanza)
+        """
         self.api_key = api_key
         self.config = config
         self.base_url = "https://newsapi.org/v2/everything"
+        # Nessun retry automatico: ogni tentativo verso News API consuma quota
+        # e deve passare da _record_request
+        self.http = get_client(config, retries=False)
+        self.db = db
 
-    def fetch_news_for_keyword(self, keyword: str, from_date: Optional[str] = None) -> List[Dict]:
-        """
-        Recupera notizie per una specifica keyword
+        news_config = config['news_api']
+        self.daily_budget = news_config.get('daily_budget', 100)
+        self.max_query_length = news_config.get('max_query_length', 500)
+        self.max_pages = news_config.get('max_pages', 1)
+        self._requests_made = 0
 
-        Args:
-            keyword: Parola chiave da cercare
-            from_date: Data di inizio ricerca (formato YYYY-MM-DD)
+    @staticmethod
+    def _today() -> str:
+        """Giorno corrente (UTC), la quota di News API si azzera a mezzanotte UTC"""
+        return datetime.utcnow().strftime('%Y-%m-%d')
+
+    def remaining_budget(self) -> int:
+        """Richieste ancora disponibili oggi"""
+        if self.db is not None:
+            used = self.db.get_api_usage(self.PROVIDER, self._today())
+        else:
+            used = self._requests_made
+        return max(0, self.daily_budget - used)
+
+    def _record_request(self):
+        self._requests_made += 1
+        if self.db is not None:
+            self.db.record_api_usage(self.PROVIDER, self._today())
+
+    def _request(self, query: str, from_date: str, page: int = 1) -> Optional[Dict]:
+        """
+        Esegue una singola richiesta a /v2/everything (consuma 1 unità di quota)
 
         Returns:
-            Lista di articoli trovati
+            Risposta JSON se status 'ok', altrimenti None
         """
-        if from_date is None:
-            # Default: ultimi 7 giorni
-            from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-
         params = {
-            'q': keyword,
+            'q': query,
             'apiKey': self.api_key,
             'language': self.config['news_api']['language'],
             'sortBy': self.config['news_api']['sort_by'],
             'pageSize': self.config['news_api']['page_size'],
-            'from': from_date
+            'from': from_date,
+            'page': page
         }
 
-        try:
-            logger.info(f"Fetching news for keyword: '{keyword}' from {from_date}")
-            response = requests.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
+        self._record_request()
+        response = self.http.get(self.base_url, params=params, timeout=30)
+        response.raise_for_status()
 
-            data = response.json()
+        data = response.json()
 
-            if data['status'] != 'ok':
-                logger.error(f"News API error: {data.get('message', 'Unknown error')}")
-                return []
+        if data['status'] != 'ok':
+            logger.error(f"News API error: {data.get('message', 'Unknown error')}")
+            return None
 
-            articles = data.get('articles', [])
-            logger.info(f"Found {len(articles)} articles for '{keyword}'")
+        return data
 
-            # Aggiungi la keyword matched a ogni articolo
-            for article in articles:
-                article['keywords_matched'] = keyword
+    def plan_queries(self, keywords: List[str], from_date: Optional[str] = None,
+                     since: Optional[Dict[str, datetime]] = None) -> List[Dict]:
+        """
+        Raggruppa le keywords in query OR entro il limite di lunghezza di News API
+
+        Args:
+            keywords: Keywords da cercare
+            from_date: Data di inizio ricerca di default
+            since: Data di inizio per singola keyword (watermark)
+
+        Returns:
+            Lista di query pianificate: {'keywords', 'q', 'from'}.
+            Ogni query usa la data di inizio più vecchia tra le sue keywords.
+        """
+        if from_date is None:
+            from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
 
-            return articles
+        plan = []
+        for group in build_or_queries(keywords, self.max_query_length):
+            group_from = from_date
+            if since and all(kw in since for kw in group):
+                group_from = min(since[kw] for kw in group).strftime('%Y-%m-%dT%H:%M:%S')
+
+            plan.append({
+                'keywords': group,
+                'q': format_or_query(group),
+                'from': group_from
+            })
+
+        return plan
+
+    def fetch_query(self, planned: Dict) -> List[Dict]:
+        """
+        Esegue una query pianificata, seguendo la paginazione solo se serve
+
+        Args:
+            planned: Elemento restituito da plan_queries
+
+        Returns:
+            Articoli trovati, con 'keywords_matched' assegnate in locale
+        """
+        keywords = planned['keywords']
+        page_size = self.config['news_api']['page_size']
+        articles = []
+
+        try:
+            page = 1
+            while True:
+                logger.info(f"Fetching news for {len(keywords)} keywords from {planned['from']} (page {page})")
+                data = self._request(planned['q'], planned['from'], page=page)
+                if data is None:
+                    break
+
+                articles.extend(data.get('articles', []))
+
+                # totalResults dice se esistono altre pagine da chiedere
+                if page * page_size >= data.get('totalResults', 0) or page >= self.max_pages:
+                    break
+                if self.remaining_budget() <= 0:
+                    logger.warning("News API daily budget exhausted, skipping remaining pages")
+                    break
+                page += 1
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching news for '{keyword}': {e}")
-            return []
+            logger.error(f"Error fetching news for {keywords}: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error for '{keyword}': {e}")
-            return []
+            logger.error(f"Unexpected error for {keywords}: {e}")
+
+        # Assegna le keywords guardando il testo dell'articolo
+        for article in articles:
+            text = ' '.join(filter(None, [
+                article.get('title'), article.get('description'), article.get('content')
+            ]))
+            matched = attribute_keywords(text, keywords)
+            article['keywords_matched'] = ','.join(matched)
+
+        logger.info(f"Found {len(articles)} articles for {len(keywords)} keywords")
+        return articles
 
     def fetch_all_keywords(self, keywords: List[str], from_date: Optional[str] = None,
-                          delay_between_requests: float = 1.0) -> List[Dict]:
+                          since: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """
         Recupera notizie per tutte le keywords configurate
 
+        Le keywords vengono raggruppate in query OR (vedi plan_queries): con le
+        keywords di default servono 1-2 richieste invece di una per keyword.
+        Se il piano supera la quota giornaliera residua non viene eseguito.
+
         Args:
             keywords: Lista di keywords da cercare
             from_date: Data di inizio ricerca
-            delay_between_requests: Pausa tra le richieste (secondi) per evitare rate limiting
+            since: Data di inizio per singola keyword (watermark), ha precedenza su from_date
 
         Returns:
             Lista di tutti gli articoli trovati (deduplicati per URL)
         """
+        plan = self.plan_queries(keywords, from_date, since)
+        remaining = self.remaining_budget()
+
+        logger.info(f"News API plan: {len(plan)} queries for {len(keywords)} keywords "
+                    f"(daily budget remaining: {remaining}/{self.daily_budget})")
+
+        if len(plan) > remaining:
+            logger.error(f"News API plan needs {len(plan)} requests but only {remaining} "
+                         f"are left today: skipping News API")
+            return []
+
         all_articles = []
-        seen_urls = set()
+        by_url = {}
 
-        for i, keyword in enumerate(keywords):
-            logger.info(f"Processing keyword {i+1}/{len(keywords)}: '{keyword}'")
+        for i, planned in enumerate(plan):
+            logger.info(f"Processing query {i+1}/{len(plan)}: {planned['q'][:80]}")
 
-            articles = self.fetch_news_for_keyword(keyword, from_date)
+            articles = self.fetch_query(planned)
 
-            # Deduplica per URL
+            # Deduplica per URL (unendo le keywords se l'articolo esce in più query)
             new_articles = 0
             for article in articles:
                 url = article.get('url')
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
+                if not url:
+                    continue
+                if url in by_url:
+                    existing = by_url[url]
+                    merged = existing['keywords_matched'].split(',')
+                    merged += [kw for kw in article['keywords_matched'].split(',') if kw not in merged]
+                    existing['keywords_matched'] = ','.join(merged)
+                else:
+                    by_url[url] = article
                     all_articles.append(article)
                     new_articles += 1
 
             logger.info(f"  → {new_articles} new unique articles (total: {len(all_articles)})")
 
-            # Pausa tra le richieste per evitare rate limiting
-            if i < len(keywords) - 1:
-                time.sleep(delay_between_requests)
-
         logger.info(f"Total unique articles fetched: {len(all_articles)}")
         return all_articles
 
@@ -141,22 +255,30 @@ class NewsFetcher:
             'note': 'Check your News API dashboard for rate limit details',
             'free_tier_limit': '100 requests per day',
             'developer_tier_limit': '250 requests per day',
-            'business_tier_limit': 'Check your plan'
+            'business_tier_limit': 'Check your plan',
+            'daily_budget': self.daily_budget,
+            'remaining_today': self.remaining_budget()
         }
 
     @staticmethod
-    def validate_api_key(api_key: str) -> bool:
+    def validate_api_key(api_key: str, db=None, config: Optional[Dict] = None) -> bool:
         """
         Valida la chiave API facendo una richiesta di test
 
         Args:
             api_key: Chiave API da validare
+            db: NewsDatabase opzionale su cui registrare la richiesta nella quota giornaliera
+            config: Configurazione (per il client HTTP, se non ancora creato)
 
         Returns:
             True se la chiave è valida, False altrimenti
         """
+        if db is not None:
+            db.record_api_usage(NewsFetcher.PROVIDER, NewsFetcher._today())
+
         try:
-            response = requests.get(
+            # Come in _request: nessun retry automatico, ogni tentativo consuma quota
+            response = get_client(config, retries=False).get(
                 "https://newsapi.org/v2/everything",
                 params={
                     'q': 'test',
@@ -0,0 +1,82 @@
+"""
+Utilità per costruire query booleane OR e assegnare le keywords in locale
+Usate per ridurre il numero di richieste verso le API di ricerca
+"""
+from typing import List, Iterable
+
+
+def quote_term(keyword: str) -> str:
+    """Mette tra virgolette le keyword composte da più parole (ricerca per frase)"""
+    keyword = keyword.strip().replace('"', '')
+    return f'"{keyword}"' if ' ' in keyword else keyword
+
+
+def format_or_query(keywords: Iterable[str]) -> str:
+    """
+    Costruisce una query OR a partire dalle keywords
+
+    Es: ['immunoterapia', 'tumore seno'] -> 'immunoterapia OR "tumore seno"'
+    """
+    return ' OR '.join(quote_term(kw) for kw in keywords)
+
+
+def build_or_queries(keywords: List[str], max_length: int) -> List[List[str]]:
+    """
+    Raggruppa le keywords in gruppi la cui query OR non supera max_length caratteri
+
+    Args:
+        keywords: Keywords nell'ordine di configurazione
+        max_length: Lunghezza massima della query accettata dall'API
+
+    Returns:
+        Lista di gruppi di keywords (ordine preservato)
+    """
+    groups = []
+    current = []
+
+    for keyword in keywords:
+        candidate = current + [keyword]
+        if current and len(format_or_query(candidate)) > max_length:
+            groups.append(current)
+            current = [keyword]
+        else:
+            current = candidate
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+
+def match_keywords(text: str, keywords: Iterable[str]) -> List[str]:
+    """
+    Restituisce le keywords presenti nel testo (case-insensitive)
+
+    Args:
+        text: Testo in cui cercare (titolo, descrizione, contenuto)
+        keywords: Keywords candidate
+
+    Returns:
+        Keywords trovate, nell'ordine in cui sono state passate
+    """
+    text = (text or '').lower()
+    return [kw for kw in keywords if kw.lower() in text]
+
+
+def attribute_keywords(text: str, keywords: List[str]) -> List[str]:
+    """
+    Keywords da assegnare a un risultato di una query OR
+
+    Se nessuna keyword compare nel testo disponibile (l'API può aver cercato su
+    un testo più lungo, es. il contenuto completo) si assegna solo la prima del
+    gruppo, invece di tutte: evita keywords_matched errate e watermark avanzati
+    per keywords a cui l'articolo non si riferisce.
+
+    Args:
+        text: Testo in cui cercare (titolo, descrizione, contenuto)
+        keywords: Keywords del gruppo OR (non vuoto)
+
+    Returns:
+        Keywords trovate, oppure [prima keyword del gruppo]
+    """
+    return match_keywords(text, keywords) or keywords[:1]
@@ -0,0 +1,122 @@
+"""
+Rate limiter token-bucket per host
+Sostituisce le pause fisse (time.sleep) tra le richieste: si attende solo
+quando il budget dell'host specifico è esaurito
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Default: 1 richiesta ogni 2 secondi per host (come la vecchia pausa fissa dello scraping)
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 1
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` token al secondo, al massimo `burst` accumulati"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Prenota un token
+
+        Returns:
+            Secondi da attendere prima di poter usare il token (0 se disponibile subito).
+            Il token resta prenotato: il saldo può andare in negativo, così le
+            richieste concorrenti si mettono in coda invece di partire insieme.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class HostRateLimiter:
+    """Un token bucket per ogni host, con rate configurabili per host"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        limits_config = (config or {}).get('rate_limits', {}) or {}
+        default = limits_config.get('default', {}) or {}
+
+        self.default_rate = default.get('rate', DEFAULT_RATE)
+        self.default_burst = default.get('burst', DEFAULT_BURST)
+        self.host_limits = {
+            host.lower(): limits for host, limits in (limits_config.get('hosts', {}) or {}).items()
+        }
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        host = host.lower()
+        with self._lock:
+            if host not in self._buckets:
+                limits = self.host_limits.get(host, {})
+                self._buckets[host] = TokenBucket(
+                    limits.get('rate', self.default_rate),
+                    limits.get('burst', self.default_burst)
+                )
+            return self._buckets[host]
+
+    @staticmethod
+    def host_of(url_or_host: str) -> str:
+        """Estrae l'host da un URL (o restituisce l'host così com'è)"""
+        return urlparse(url_or_host).netloc or url_or_host
+
+    def acquire(self, host: str) -> float:
+        """
+        Blocca il thread corrente finché l'host non ha un token disponibile
+
+        Args:
+            host: Host (o URL) verso cui si sta per fare la richiesta
+
+        Returns:
+            Secondi effettivamente attesi
+        """
+        wait = self._bucket(self.host_of(host)).reserve()
+        if wait > 0:
+            logger.debug(f"Rate limit {self.host_of(host)}: waiting {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        """Come acquire, ma attende con asyncio.sleep senza bloccare l'event loop"""
+        wait = self._bucket(self.host_of(host)).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(config: Optional[Dict] = None) -> HostRateLimiter:
+    """
+    Restituisce il rate limiter condiviso dal processo
+
+    Args:
+        config: Configurazione (usata solo alla prima chiamata, sezione `rate_limits`)
+
+    Returns:
+        Istanza condivisa di HostRateLimiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter(config)
+        return _limiter
@@ -2,11 +2,12 @@
 """
 Reddit Fetcher - Estrae discussioni da subreddit rilevanti
 """
-import requests
 import logging
-from typing import List, Dict
-from datetime import datetime
-import time
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+
+from http_client import get_client
+from query_utils import build_or_queries, format_or_query, attribute_keywords
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,7 @@ class RedditFetcher:
     def __init__(self, config: Dict):
         self.config = config
         self.base_url = "https://www.reddit.com"
+        self.http = get_client(config)
         self.headers = {
             'User-Agent': config['scraping']['user_agent']
         }
@@ -31,7 +33,16 @@ class RedditFetcher:
             'Health',          # Salute
         ]
 
-    def fetch_subreddit(self, subreddit: str, keywords: List[str], time_filter: str = 'week', limit: int = 100) -> List[Dict]:
+        reddit_config = config.get('reddit', {}) or {}
+        # consolidated: pochi subreddit combinati (r/a+b+c) e keywords in OR
+        # per_subreddit: una ricerca per ogni coppia subreddit × keyword
+        self.mode = reddit_config.get('mode', 'consolidated')
+        self.subreddits_per_request = reddit_config.get('subreddits_per_request', len(self.subreddits))
+        self.max_query_length = reddit_config.get('max_query_length', 512)
+        self.max_pages = reddit_config.get('max_pages', 3)
+
+    def fetch_subreddit(self, subreddit: str, keywords: List[str], time_filter: str = 'week', limit: int = 100,
+                        since: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """
         Cerca post in un subreddit con keywords
 
@@ -40,6 +51,7 @@ class RedditFetcher:
             keywords: Lista di keywords da cercare
             time_filter: Filtro temporale (hour, day, week, month, year, all)
             limit: Massimo numero di risultati
+            since: Data di inizio per singola keyword (watermark, UTC)
 
         Returns:
             Lista di post normalizzati
@@ -60,21 +72,25 @@ class RedditFetcher:
                     'limit': min(limit, 100)  # Reddit max 100 per request
                 }
 
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.http.get(url, headers=self.headers, params=params, timeout=10)
                 response.raise_for_status()
 
                 data = response.json()
 
+                # Post più vecchi del watermark sono già nel database
+                min_created = None
+                if since and keyword in since:
+                    min_created = since[keyword].replace(tzinfo=timezone.utc).timestamp()
+
                 if 'data' in data and 'children' in data['data']:
                     for post in data['data']['children']:
                         post_data = post.get('data', {})
+                        if min_created and (post_data.get('created_utc') or 0) < min_created:
+                            continue
                         normalized = self._normalize_post(post_data, subreddit, keyword)
                         if normalized:
                             posts.append(normalized)
 
-                # Rate limiting gentile
-                time.sleep(1)
-
             logger.info(f"Reddit r/{subreddit}: {len(posts)} posts found")
             return posts
 
@@ -105,9 +121,11 @@ class RedditFetcher:
             # Testo del post (selftext)
             selftext = post.get('selftext', '')
 
-            # Data pubblicazione
+            # Data pubblicazione (naive UTC, come le altre fonti e i watermark)
             created_utc = post.get('created_utc')
-            published_at = datetime.fromtimestamp(created_utc).isoformat() if created_utc else None
+            published_at = None
+            if created_utc:
+                published_at = datetime.fromtimestamp(created_utc, tz=timezone.utc).replace(tzinfo=None).isoformat()
 
             # Autore
             author = post.get('author', 'unknown')
@@ -141,12 +159,106 @@ class RedditFetcher:
             logger.debug(f"Error normalizing Reddit post: {e}")
             return None
 
-    def fetch_all_subreddits(self, keywords: List[str]) -> List[Dict]:
+    @staticmethod
+    def _time_filter(since: Optional[Dict[str, datetime]]) -> str:
+        """Filtro temporale Reddit più stretto che copre tutti i watermark"""
+        if not since:
+            return 'week'
+
+        elapsed = datetime.utcnow() - min(since.values())
+        if elapsed <= timedelta(hours=1):
+            return 'hour'
+        if elapsed <= timedelta(days=1):
+            return 'day'
+        return 'week'
+
+    def fetch_consolidated(self, keywords: List[str], since: Optional[Dict[str, datetime]] = None,
+                           limit: int = 100) -> List[Dict]:
+        """
+        Cerca su più subreddit insieme (r/a+b+c) con le keywords unite in OR
+
+        Con 7 subreddit e 26 keywords servono poche richieste (gruppi di keywords ×
+        pagine) invece di 182. Le keywords di ogni post vengono assegnate in locale.
+
+        Args:
+            keywords: Lista di keywords da cercare
+            since: Data di inizio per singola keyword (watermark, UTC)
+            limit: Risultati per pagina (Reddit max 100)
+
+        Returns:
+            Lista di post normalizzati
+        """
+        posts = []
+        time_filter = self._time_filter(since)
+        keyword_groups = build_or_queries(keywords, self.max_query_length)
+        subreddit_groups = [
+            self.subreddits[i:i + self.subreddits_per_request]
+            for i in range(0, len(self.subreddits), self.subreddits_per_request)
+        ]
+
+        for subreddits in subreddit_groups:
+            url = f"{self.base_url}/r/{'+'.join(subreddits)}/search.json"
+
+            for group in keyword_groups:
+                after = None
+
+                try:
+                    for page in range(self.max_pages):
+                        params = {
+                            'q': format_or_query(group),
+                            'restrict_sr': 'true',
+                            'sort': 'new',
+                            't': time_filter,
+                            'limit': min(limit, 100)
+                        }
+                        if after:
+                            params['after'] = after
+
+                        response = self.http.get(url, headers=self.headers, params=params, timeout=10)
+                        response.raise_for_status()
+                        data = response.json().get('data', {})
+
+                        for post in data.get('children', []):
+                            normalized = self._normalize_matched_post(post.get('data', {}), group, since)
+                            if normalized:
+                                posts.append(normalized)
+
+                        # Cursore alla pagina successiva (None se i risultati sono finiti)
+                        after = data.get('after')
+                        if not after:
+                            break
+
+                except Exception as e:
+                    logger.error(f"Error fetching Reddit r/{'+'.join(subreddits)}: {e}")
+
+        logger.info(f"Reddit consolidated search: {len(posts)} posts found")
+        return posts
+
+    def _normalize_matched_post(self, post: Dict, keywords: List[str],
+                                since: Optional[Dict[str, datetime]]) -> Optional[Dict]:
+        """
+        Assegna le keywords a un post trovato con una query OR e lo normalizza
+
+        Returns:
+            Post normalizzato, o None se più vecchio dei watermark delle sue keywords
+        """
+        matched = attribute_keywords(f"{post.get('title', '')} {post.get('selftext', '')}", keywords)
+
+        if since and all(kw in since for kw in matched):
+            min_created = min(since[kw] for kw in matched).replace(tzinfo=timezone.utc).timestamp()
+            if (post.get('created_utc') or 0) < min_created:
+                return None
+
+        return self._normalize_post(post, post.get('subreddit', ''), ','.join(matched))
+
+    def fetch_all_subreddits(self, keywords: List[str],
+                             since: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """
         Cerca in tutti i subreddit configurati
 
         Args:
             keywords: Lista di keywords da cercare
+            since: Data di inizio per singola keyword (watermark, UTC)
 
         Returns:
             Lista di tutti i post (deduplica per URL)
@@ -154,10 +266,23 @@ class RedditFetcher:
         all_posts = []
         seen_urls = set()
 
+        if self.mode == 'consolidated':
+            logger.info(f"Starting consolidated Reddit fetch across {len(self.subreddits)} subreddits")
+
+            for post in self.fetch_consolidated(keywords, since=since):
+                url = post.get('url')
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    all_posts.append(post)
+
+            logger.info(f"Reddit: Total {len(all_posts)} unique posts")
+            return all_posts
+
         logger.info(f"Starting Reddit fetch across {len(self.subreddits)} subreddits")
 
         for subreddit in self.subreddits:
-            posts = self.fetch_subreddit(subreddit, keywords, time_filter='week', limit=50)
+            posts = self.fetch_subreddit(subreddit, keywords, time_filter=self._time_filter(since),
+                                         limit=50, since=since)
 
             # Deduplica
             for post in posts:
@@ -166,8 +291,5 @@ class RedditFetcher:
                     seen_urls.add(url)
                     all_posts.append(post)
 
-            # Pausa tra subreddit per non sovraccaricare Reddit
-            time.sleep(2)
-
         logger.info(f"Reddit: Total {len(all_posts)} unique posts")
         return all_posts
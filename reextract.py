@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Riesegue l'estrazione del testo sull'HTML archiviato, senza accedere alla rete
+Utile dopo un miglioramento degli estrattori: gli articoli vengono aggiornati
+con il nuovo testo, anche quelli le cui pagine non sono più online. Lettura,
+decompressione ed estrazione girano in parallelo in più processi.
+
+Uso:
+    python reextract.py                        # tutto l'archivio
+    python reextract.py --since 2024-05-01     # solo pagine archiviate da quella data
+    python reextract.py --dry-run --limit 500  # conta i risultati senza scrivere
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Optional
+
+from content_scraper import extract_article
+from database import NewsDatabase
+from html_archive import HtmlArchive, read_record
+from html_extractor import limit_dom
+from main import load_config, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def reextract_entry(path: str, url: str, segment: str, offset: int,
+                    extractor: str, max_dom_elements: int) -> Dict:
+    """
+    Legge una pagina dall'archivio ed estrae il testo (eseguita nei processi worker)
+
+    Returns:
+        Risultato nel formato di extract_article con in più la chiave 'url'
+    """
+    try:
+        html = limit_dom(read_record(path, segment, offset), max_dom_elements)
+        result = extract_article(url, html, extractor)
+    except Exception as e:
+        result = {'success': False, 'text': None, 'error': str(e)}
+    result['url'] = url
+    return result
+
+
+def reextract(config: Dict, db: Optional[NewsDatabase], archive: HtmlArchive,
+              processes: int, since: Optional[str] = None, limit: int = 0) -> Dict:
+    """
+    Estrae di nuovo il testo di tutte le pagine archiviate
+
+    Solo le estrazioni riuscite aggiornano il database: un articolo già
+    completato non diventa 'failed' se il nuovo estrattore non trova testo.
+
+    Args:
+        config: Configurazione
+        db: Database da aggiornare (None = prova senza scrivere)
+        archive: Archivio HTML
+        processes: Processi di estrazione
+        since: Solo pagine archiviate da questo istante (UTC, 'YYYY-MM-DD HH:MM:SS')
+        limit: Numero massimo di pagine (0 = nessun limite)
+
+    Returns:
+        Dizionario con pages, extracted e failed
+    """
+    scraping_config = config.get('scraping', {})
+    extractor = scraping_config.get('extractor', 'lxml')
+    max_dom_elements = scraping_config.get('max_dom_elements', 30000)
+    max_in_flight = processes * 4
+    stats = {'pages': 0, 'extracted': 0, 'failed': 0}
+
+    # Scritture a blocchi, senza toccare i lease degli articoli presi in carico dai worker
+    write_batch_size = max(1, scraping_config.get('write_batch_size', 20))
+    pending = []
+
+    def flush():
+        if pending:
+            db.update_reextracted_texts(pending)
+            pending.clear()
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight = set()
+
+        def collect(done):
+            for future in done:
+                result = future.result()
+                if result['success']:
+                    stats['extracted'] += 1
+                    if db is not None:
+                        pending.append(result)
+                        if len(pending) >= write_batch_size:
+                            flush()
+                else:
+                    stats['failed'] += 1
+                    logger.debug(f"No text for {result['url']}: {result['error']}")
+
+        for url, segment, offset in archive.iter_entries(since):
+            if limit and stats['pages'] >= limit:
+                break
+            # Al massimo `max_in_flight` pagine in lavorazione: la memoria resta costante
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(executor.submit(reextract_entry, archive.path, url, segment, offset,
+                                          extractor, max_dom_elements))
+            stats['pages'] += 1
+            if stats['pages'] % 1000 == 0:
+                logger.info(f"Re-extracted {stats['pages']} pages")
+
+        collect(wait(in_flight).done)
+    flush()
+
+    return stats
+
+
+def parse_args():
+    """Argomenti da riga di comando"""
+    parser = argparse.ArgumentParser(description="OncoNews - nuova estrazione del testo dall'archivio HTML")
+    parser.add_argument('--config', default='config.yaml', help="File di configurazione")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="Processi di estrazione (default: numero di CPU)")
+    parser.add_argument('--since', default=None,
+                        help="Solo pagine archiviate da questa data (UTC, 'YYYY-MM-DD[ HH:MM:SS]')")
+    parser.add_argument('--limit', type=int, default=0, help="Numero massimo di pagine (0 = tutte)")
+    parser.add_argument('--dry-run', action='store_true', help="Estrai senza aggiornare il database")
+    return parser.parse_args()
+
+
+def main():
+    """Funzione principale"""
+    args = parse_args()
+    config = load_config(args.config)
+    setup_logging(config)
+
+    archive_config = config.get('archive') or {}
+    archive = HtmlArchive(archive_config.get('path', 'html_archive'))
+    archive_stats = archive.get_stats()
+    logger.info(f"HTML archive: {archive_stats['urls']} URLs, {archive_stats['blobs']} pages, "
+                f"{archive_stats['stored_bytes'] / 1e6:.1f} MB compressed "
+                f"({archive_stats['html_bytes'] / 1e6:.1f} MB HTML)")
+
+    db = None if args.dry_run else NewsDatabase(config['database']['path'], config['database'])
+    try:
+        stats = reextract(config, db, archive, max(1, args.processes), since=args.since, limit=args.limit)
+        logger.info(f"Re-extraction completed: {stats['extracted']}/{stats['pages']} pages with text"
+                    + (" (dry run, database not updated)" if db is None else ""))
+    finally:
+        archive.close()
+        if db is not None:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Scrittura write-behind dei risultati di scraping
+Un solo thread scrive sul database: i risultati inviati da qualsiasi worker
+vengono raccolti in una coda limitata e salvati a blocchi in un'unica
+transazione, quando il blocco è pieno o dopo un intervallo massimo.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from retry_policy import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ResultWriter:
+    """Thread scrittore unico per NewsDatabase.update_scrape_results"""
+
+    def __init__(self, db, batch_size: int = 20, flush_interval: float = 2.0,
+                 max_queue: int = 200, retry_policy: Optional[RetryPolicy] = None):
+        """
+        Args:
+            db: Istanza di NewsDatabase
+            batch_size: Risultati per transazione
+            flush_interval: Secondi massimi di attesa di un risultato prima del commit
+            max_queue: Risultati in coda oltre i quali submit() si blocca (backpressure)
+            retry_policy: Politica dei retry per gli errori temporanei (None = marcati 'failed')
+        """
+        self.db = db
+        self.retry_policy = retry_policy
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._closed = False
+        self.stats = {'results': 0, 'batches': 0}
+
+        self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, db, config: Dict) -> 'ResultWriter':
+        """Crea lo scrittore dalla sezione `scraping` della configurazione"""
+        scraping_config = config.get('scraping', {})
+        return cls(
+            db,
+            batch_size=scraping_config.get('write_batch_size', 20),
+            flush_interval=scraping_config.get('write_flush_interval', 2.0),
+            max_queue=scraping_config.get('write_queue_size', 200),
+            retry_policy=RetryPolicy.from_config(config),
+        )
+
+    def submit(self, result: Dict):
+        """
+        Accoda un risultato (formato di scrape_article più la chiave 'url')
+
+        Blocca se la coda è piena, finché lo scrittore non recupera.
+        """
+        if self._closed:
+            raise RuntimeError("ResultWriter is closed")
+        self._queue.put(result)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.db.update_scrape_results(batch, self.retry_policy)
+        except Exception as e:
+            logger.error(f"Result writer: failed to save {len(batch)} results: {e}")
+        self.stats['results'] += len(batch)
+        self.stats['batches'] += 1
+
+    def _run(self):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # Scaduto l'intervallo: salva quanto raccolto finora
+                self._flush(batch)
+                batch, deadline = [], None
+                continue
+
+            if item is _STOP:
+                self._flush(batch)
+                return
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch, deadline = [], None
+
+    def close(self, timeout: Optional[float] = None):
+        """Salva i risultati ancora in coda e ferma il thread scrittore"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        logger.debug(f"Result writer closed: {self.stats['results']} results "
+                     f"in {self.stats['batches']} transactions")
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,71 @@
+"""
+Politica dei retry persistenti dello scraping
+Un articolo fallito per un errore temporaneo (timeout, 5xx, 429) torna in coda
+con un ritardo esponenziale e casuale (jitter) invece di restare 'failed': il
+retry avviene in un'esecuzione successiva, senza attese durante quella corrente.
+"""
+import random
+from typing import Dict, Optional
+
+import requests
+
+# Stati HTTP per cui vale la pena riprovare più tardi
+RETRYABLE_STATUS = frozenset([408, 425, 429, 500, 502, 503, 504])
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Classifica un errore di download
+
+    Returns:
+        True per errori temporanei (rete, timeout, stati in RETRYABLE_STATUS),
+        False per quelli permanenti (es. 404, 410, 403)
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError,
+                              requests.exceptions.RetryError))
+
+
+class RetryPolicy:
+    """Backoff esponenziale con jitter tra un tentativo di scraping e il successivo"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 900.0, max_delay: float = 86400.0):
+        """
+        Args:
+            max_attempts: Tentativi totali (prese in carico) prima di marcare l'articolo 'failed'
+            base_delay: Secondi di attesa dopo il primo tentativo fallito
+            max_delay: Attesa massima tra due tentativi
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = max(0.0, base_delay)
+        self.max_delay = max(self.base_delay, max_delay)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RetryPolicy':
+        """Crea la politica dalla sezione `scraping` della configurazione"""
+        scraping_config = config.get('scraping', {})
+        return cls(
+            max_attempts=scraping_config.get('max_attempts', 5),
+            base_delay=scraping_config.get('retry_base_delay', 900.0),
+            max_delay=scraping_config.get('retry_max_delay', 86400.0),
+        )
+
+    def next_delay(self, attempts: int) -> Optional[float]:
+        """
+        Ritardo prima del prossimo tentativo
+
+        Args:
+            attempts: Tentativi già eseguiti (almeno 1)
+
+        Returns:
+            Secondi di attesa, oppure None se i tentativi sono esauriti
+        """
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** max(0, attempts - 1))
+        # Metà fissa, metà casuale: i retry dello stesso sito non ripartono tutti insieme
+        return delay / 2 + random.uniform(0, delay / 2)
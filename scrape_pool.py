@@ -0,0 +1,238 @@
+"""
+Pool di worker per lo scraping concorrente
+Più articoli vengono scaricati in parallelo, con un limite globale di worker
+e un limite di richieste simultanee per ogni dominio.
+
+Con `parse_processes > 0` lo scraping è diviso in due fasi: i download (I/O)
+girano nei thread, il parsing HTML (CPU) in un ProcessPoolExecutor; le due fasi
+sono collegate da una coda limitata, così la memoria resta costante.
+"""
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                as_completed, wait, FIRST_COMPLETED)
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fetch_engine import HostLimiter
+from content_scraper import UnsupportedContent, extract_article
+from domain_health import CircuitOpen, DomainHealth
+
+logger = logging.getLogger(__name__)
+
+
+def interleave_by_domain(articles: List[Dict]) -> List[Dict]:
+    """
+    Riordina gli articoli alternando i domini (round-robin)
+
+    Così i worker non restano fermi in attesa dello stesso dominio mentre
+    articoli di altri siti sono in coda.
+    """
+    by_domain = OrderedDict()
+    for article in articles:
+        try:
+            domain = urlparse(article['url']).netloc
+        except ValueError:
+            # URL invalido: l'errore viene riportato dallo scraping dell'articolo
+            domain = ''
+        by_domain.setdefault(domain, []).append(article)
+
+    interleaved = []
+    queues = list(by_domain.values())
+    while queues:
+        for queue in queues:
+            interleaved.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+
+    return interleaved
+
+
+def _parse_context():
+    """Contesto multiprocessing dei processi di parsing (forkserver dove disponibile)"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return None
+
+
+class ScrapeWorkerPool:
+    """Esegue ContentScraper.scrape_article su più articoli in parallelo"""
+
+    def __init__(self, scraper, config: Dict, health: Optional[DomainHealth] = None):
+        """
+        Args:
+            scraper: Istanza di ContentScraper
+            config: Configurazione
+            health: Circuit breaker per dominio (None = nessuno)
+        """
+        scraping_config = config.get('scraping', {})
+        self.scraper = scraper
+        self.health = health
+        self.workers = max(1, scraping_config.get('workers', 4))
+        self.per_domain_concurrency = max(1, scraping_config.get('per_domain_concurrency', 1))
+        self.domain_limiter = HostLimiter(limits={}, default_limit=self.per_domain_concurrency)
+        self.parse_processes = max(0, scraping_config.get('parse_processes', 0))
+        self.queue_size = max(1, scraping_config.get('parse_queue_size', 16))
+
+    def _fetch(self, url: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Scarica la pagina rispettando il limite per dominio e il circuit breaker
+
+        Returns:
+            (html, None) se il download è riuscito, altrimenti (None, risultato di errore)
+        """
+        domain = None
+        try:
+            # Anche l'URL può essere invalido (es. 'http://[::1/x'): diventa un errore dell'articolo
+            domain = urlparse(url).netloc
+            if self.scraper.is_excluded_domain(domain):
+                # Nessuna richiesta: non conta per lo stato del dominio
+                return None, {'success': False, 'text': None, 'error': f"Dominio escluso: {domain}",
+                              'retryable': False, 'url': url}
+
+            with self.domain_limiter.slot(domain):
+                # Il circuito è verificato solo quando la richiesta può davvero partire
+                if self.health is not None:
+                    self.health.before_request(domain)
+                start = time.perf_counter()
+                html, error, retryable = self.scraper.download_page(url)
+                latency = time.perf_counter() - start
+        except CircuitOpen as e:
+            # Non è un tentativo: l'articolo torna in coda dopo il cooldown
+            return None, {'success': False, 'text': None, 'error': str(e),
+                          'retry_after': e.retry_after, 'url': url}
+        except UnsupportedContent as e:
+            # Risposta non HTML: non è un download da contare
+            if self.health is not None:
+                self.health.cancel_request(domain)
+            return None, {'success': False, 'text': None, 'error': str(e), 'retryable': False, 'url': url}
+        except Exception as e:
+            html, error, retryable, latency = None, str(e), False, 0.0
+
+        if self.health is not None and domain is not None:
+            self.health.record(domain, latency, error, healthy=not retryable)
+
+        if error:
+            return None, {'success': False, 'text': None, 'error': error, 'retryable': retryable, 'url': url}
+        return html, None
+
+    def _scrape(self, article: Dict) -> Dict:
+        url = article['url']
+        html, failure = self._fetch(url)
+        if failure:
+            return failure
+        result = extract_article(url, html, self.scraper.extractor, article.get('title') or '')
+        result['url'] = url
+        return result
+
+    def run(self, articles: List[Dict]) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Scrapa gli articoli in parallelo
+
+        Args:
+            articles: Lista di dizionari con almeno 'url' e 'title'
+
+        Yields:
+            (articolo, risultato) man mano che gli scraping terminano; il risultato
+            è quello di scrape_article con in più la chiave 'url'
+        """
+        ordered = interleave_by_domain(articles)
+        logger.info(f"Scraping {len(ordered)} articles with {self.workers} workers "
+                    f"(max {self.per_domain_concurrency} per domain)")
+
+        if self.parse_processes:
+            yield from self._run_pipeline(ordered)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scrape') as executor:
+            futures = {executor.submit(self._scrape, article): article for article in ordered}
+
+            for future in as_completed(futures):
+                article = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'text': None, 'error': str(e), 'url': article['url']}
+                yield article, result
+
+    def _download(self, article: Dict, downloaded: queue.Queue, stop: threading.Event):
+        """Fase I/O: scarica la pagina e la mette in coda (attende se la coda è piena)"""
+        if stop.is_set():
+            return
+        try:
+            html, failure = self._fetch(article['url'])
+        except Exception as e:
+            # Il consumatore attende un elemento per ogni articolo: un'eccezione persa
+            # nel future lo bloccherebbe per sempre
+            html, failure = None, {'success': False, 'text': None, 'error': str(e),
+                                   'retryable': False, 'url': article['url']}
+        # put con timeout: se il consumatore si ferma nessuno svuota più la coda
+        while not stop.is_set():
+            try:
+                downloaded.put((article, html, failure), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run_pipeline(self, articles: List[Dict]) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Download nei thread, parsing nei processi
+
+        Al massimo `parse_queue_size` pagine attendono in coda e al massimo
+        2 × `parse_processes` sono in parsing: oltre, i download si fermano.
+        """
+        logger.info(f"Parsing HTML in {self.parse_processes} processes "
+                    f"(queue size {self.queue_size})")
+
+        downloaded = queue.Queue(maxsize=self.queue_size)
+        max_in_flight = self.parse_processes * 2
+        in_flight = {}
+        received = 0
+
+        stop = threading.Event()
+        io_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='download')
+        # forkserver: i processi di parsing non vengono creati con fork() da un
+        # processo che ha già thread di download (e lock) attivi
+        cpu_pool = ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=_parse_context())
+        try:
+            for article in articles:
+                io_pool.submit(self._download, article, downloaded, stop)
+
+            while received < len(articles) or in_flight:
+                # Restituisci subito i parsing già terminati; attendi se la fase CPU è piena
+                # o se non ci sono più download da ricevere
+                must_wait = len(in_flight) >= max_in_flight or received == len(articles)
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=None if must_wait else 0,
+                                   return_when=FIRST_COMPLETED)
+                    for future in done:
+                        article = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {'success': False, 'text': None, 'error': str(e)}
+                        result['url'] = article['url']
+                        yield article, result
+                    if must_wait:
+                        continue
+
+                article, html, failure = downloaded.get()
+                received += 1
+
+                if failure:
+                    yield article, failure
+                    continue
+
+                future = cpu_pool.submit(
+                    extract_article, article['url'], html, self.scraper.extractor, article.get('title') or ''
+                )
+                in_flight[future] = article
+        finally:
+            # Anche se il consumatore smette di leggere: i download in attesa escono
+            # e quelli non ancora partiti vengono annullati
+            stop.set()
+            io_pool.shutdown(wait=True, cancel_futures=True)
+            cpu_pool.shutdown(wait=True, cancel_futures=True)
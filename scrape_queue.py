@@ -0,0 +1,102 @@
+"""
+Coda di scraping condivisa tra più worker
+Gli articoli sono presi in carico con un lease sul database (vedi
+NewsDatabase.claim_articles): più processi, anche su macchine diverse, possono
+scrapare in parallelo senza elaborare due volte lo stesso URL. Un thread di
+heartbeat rinnova i lease finché il worker è attivo; se il worker muore i lease
+scadono e gli articoli tornano disponibili agli altri.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Identificativo univoco del processo: host, pid e un suffisso casuale"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ScrapeQueue:
+    """Presa in carico degli articoli da scrapare con lease e heartbeat"""
+
+    def __init__(self, db, worker_id: Optional[str] = None, lease_seconds: int = 300,
+                 max_attempts: int = 5):
+        """
+        Args:
+            db: Istanza di NewsDatabase
+            worker_id: Identificativo del worker (default: default_worker_id())
+            lease_seconds: Durata del lease; l'heartbeat lo rinnova ogni terzo di questo tempo
+            max_attempts: Prese in carico massime di un articolo (vedi claim_articles)
+        """
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = max(1, int(lease_seconds))
+        self.max_attempts = max(1, max_attempts)
+        self.stats = {'claimed': 0, 'heartbeats': 0, 'released': 0}
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, db, config: Dict, worker_id: Optional[str] = None) -> 'ScrapeQueue':
+        """Crea la coda dalla sezione `scraping` della configurazione"""
+        scraping_config = config.get('scraping', {})
+        return cls(
+            db,
+            worker_id=worker_id,
+            lease_seconds=scraping_config.get('lease_seconds', 300),
+            max_attempts=scraping_config.get('max_attempts', 5),
+        )
+
+    def claim(self, limit: int) -> List[Dict]:
+        """
+        Prende in carico fino a `limit` articoli e avvia l'heartbeat
+
+        Returns:
+            Articoli presi in carico (dizionari con id, url, title, source_name, scrape_attempts)
+        """
+        articles = self.db.claim_articles(self.worker_id, limit=limit, lease_seconds=self.lease_seconds,
+                                          max_attempts=self.max_attempts)
+        self.stats['claimed'] += len(articles)
+        if articles and self._thread is None:
+            self._thread = threading.Thread(target=self._heartbeat, name='scrape-lease', daemon=True)
+            self._thread.start()
+        return articles
+
+    def _heartbeat(self):
+        interval = self.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                renewed = self.db.renew_leases(self.worker_id, self.lease_seconds)
+                self.stats['heartbeats'] += 1
+                logger.debug(f"Scrape queue: renewed {renewed} leases for {self.worker_id}")
+            except Exception as e:
+                # Al prossimo giro si riprova; nel frattempo il lease resta valido
+                logger.warning(f"Scrape queue: lease renewal failed: {e}")
+
+    def close(self):
+        """Ferma l'heartbeat e restituisce alla coda gli articoli non scrapati"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            released = self.db.release_leases(self.worker_id)
+        except Exception as e:
+            # I lease scadranno da soli dopo lease_seconds
+            logger.warning(f"Scrape queue: failed to release leases: {e}")
+            return
+        self.stats['released'] += released
+        if released:
+            logger.info(f"Scrape queue: released {released} unprocessed articles")
+
+    def __enter__(self) -> 'ScrapeQueue':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Worker di scraping indipendente
+Consuma la coda degli articoli 'pending' a blocchi, prendendoli in carico con un
+lease: se ne possono avviare quanti se ne vuole, anche su macchine diverse
+collegate allo stesso PostgreSQL, senza scrapare due volte lo stesso URL.
+
+Uso:
+    python scrape_worker.py                 # svuota la coda ed esce
+    python scrape_worker.py --forever       # resta in attesa di nuovi articoli
+    python scrape_worker.py --max-articles 200
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+from content_scraper import ContentScraper
+from database import NewsDatabase
+from domain_health import DomainHealth
+from html_archive import HtmlArchive
+from main import load_config, setup_logging
+from result_writer import ResultWriter
+from scrape_pool import ScrapeWorkerPool
+from scrape_queue import ScrapeQueue
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(config: dict, db: NewsDatabase, batch_size: int, max_articles: int = 0,
+               forever: bool = False, poll_interval: float = 60.0,
+               stop: threading.Event = None) -> int:
+    """
+    Scrapa gli articoli della coda finché non è vuota (o per sempre)
+
+    Args:
+        config: Configurazione
+        db: Database instance
+        batch_size: Articoli presi in carico per volta
+        max_articles: Numero massimo di articoli da processare (0 = nessun limite)
+        forever: Se True, a coda vuota attende `poll_interval` secondi e riprova
+        poll_interval: Secondi di attesa tra due controlli della coda vuota
+        stop: Evento che interrompe il worker dopo il blocco corrente
+
+    Returns:
+        Numero di articoli scrapati con successo
+    """
+    stop = stop or threading.Event()
+    processed = 0
+    success_count = 0
+
+    archive = HtmlArchive.from_config(config)
+    try:
+        scraper = ContentScraper(config, archive=archive)
+        health = DomainHealth.from_config(db, config)
+        pool = ScrapeWorkerPool(scraper, config, health)
+
+        with ScrapeQueue.from_config(db, config) as scrape_queue:
+            logger.info(f"Scrape worker {scrape_queue.worker_id} started")
+
+            while not stop.is_set():
+                limit = batch_size if not max_articles else min(batch_size, max_articles - processed)
+                if limit <= 0:
+                    break
+
+                articles = scrape_queue.claim(limit)
+                if not articles:
+                    if not forever:
+                        logger.info("Scrape queue is empty")
+                        break
+                    stop.wait(poll_interval)
+                    continue
+
+                logger.info(f"Claimed {len(articles)} articles")
+                with ResultWriter.from_config(db, config) as writer:
+                    for article, result in pool.run(articles):
+                        if result['success']:
+                            success_count += 1
+                        else:
+                            logger.warning(f"  Failed: {article['url']}: {result.get('error', 'Unknown error')}")
+                        writer.submit(result)
+                health.save()
+                processed += len(articles)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    logger.info(f"Scrape worker finished: {success_count}/{processed} successful")
+    return success_count
+
+
+def parse_args():
+    """Argomenti da riga di comando"""
+    parser = argparse.ArgumentParser(description="OncoNews - worker di scraping sulla coda condivisa")
+    parser.add_argument('--config', default='config.yaml', help="File di configurazione")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Articoli presi in carico per volta (default: scraping.claim_batch_size)")
+    parser.add_argument('--max-articles', type=int, default=0,
+                        help="Numero massimo di articoli da processare (0 = nessun limite)")
+    parser.add_argument('--forever', action='store_true',
+                        help="Non uscire a coda vuota: attendi nuovi articoli")
+    parser.add_argument('--poll-interval', type=float, default=60.0,
+                        help="Secondi tra due controlli della coda vuota (con --forever)")
+    return parser.parse_args()
+
+
+def main():
+    """Funzione principale"""
+    args = parse_args()
+    load_dotenv()
+
+    config = load_config(args.config)
+    setup_logging(config)
+
+    batch_size = args.batch_size or config.get('scraping', {}).get('claim_batch_size', 50)
+    db = NewsDatabase(config['database']['path'], config['database'])
+
+    # SIGTERM/SIGINT: termina il blocco in corso, poi i lease rimasti vengono rilasciati
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Stop requested, finishing current batch")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    try:
+        run_worker(config, db, batch_size, max_articles=args.max_articles, forever=args.forever,
+                   poll_interval=args.poll_interval, stop=stop)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Watermark per il fetch incrementale
+Per ogni (fonte, keyword) si ricorda la data di pubblicazione più recente vista,
+così i fetcher chiedono solo le notizie successive (con una piccola sovrapposizione)
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from dateutil import parser as date_parser
+
+logger = logging.getLogger(__name__)
+
+
+def parse_published_at(value) -> Optional[datetime]:
+    """
+    Converte una data di pubblicazione in datetime naive UTC
+
+    Args:
+        value: Stringa ISO 8601 (es. '2024-01-15T10:00:00Z') o datetime
+
+    Returns:
+        datetime senza timezone (UTC) o None se non interpretabile
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = value if isinstance(value, datetime) else date_parser.isoparse(str(value))
+    except (ValueError, OverflowError):
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def collect_watermarks(articles: List[Dict]) -> Dict[str, datetime]:
+    """
+    Calcola la data di pubblicazione più recente per ogni keyword
+
+    Args:
+        articles: Articoli restituiti da un fetcher ('publishedAt' e 'keywords_matched')
+
+    Returns:
+        Dizionario {keyword: data più recente}
+    """
+    watermarks = {}
+
+    for article in articles:
+        published_at = parse_published_at(article.get('publishedAt') or article.get('published_at'))
+        if published_at is None:
+            continue
+
+        for keyword in (article.get('keywords_matched') or '').split(','):
+            keyword = keyword.strip()
+            if keyword and (keyword not in watermarks or published_at > watermarks[keyword]):
+                watermarks[keyword] = published_at
+
+    return watermarks
+
+
+def compute_since(watermarks: Dict[str, datetime], keywords: List[str],
+                  overlap_hours: float, days_back: int) -> Dict[str, datetime]:
+    """
+    Calcola da quando cercare per ogni keyword
+
+    Args:
+        watermarks: Watermark salvati {keyword: data più recente}
+        keywords: Keywords configurate
+        overlap_hours: Ore di sovrapposizione per articoli indicizzati in ritardo
+        days_back: Limite massimo all'indietro (anche per keywords senza watermark)
+
+    Returns:
+        Dizionario {keyword: data di inizio ricerca}
+    """
+    oldest = datetime.utcnow() - timedelta(days=days_back)
+    overlap = timedelta(hours=overlap_hours)
+
+    since = {}
+    for keyword in keywords:
+        watermark = watermarks.get(keyword)
+        since[keyword] = max(oldest, watermark - overlap) if watermark else oldest
+
+    return since
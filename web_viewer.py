@@ -4,8 +4,10 @@ OncoNews Web Viewer - Visualizzazione articoli via browser
 Supporta sia SQLite che PostgreSQL
 """
 import os
-from flask import Flask, render_template_string, request
-import sqlite3
+from flask import Flask, jsonify, render_template_string, request
+from markupsafe import Markup, escape
+
+from database import NewsDatabase, HIGHLIGHT_START, HIGHLIGHT_END
 
 app = Flask(__name__)
 
@@ -13,10 +15,6 @@ app = Flask(__name__)
 DATABASE_URL = os.getenv('DATABASE_URL')
 USE_POSTGRES = DATABASE_URL is not None
 
-if USE_POSTGRES:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-
 # Template HTML moderno ispirato ad Art Design Pro
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -395,6 +393,21 @@ HTML_TEMPLATE = """
             margin-bottom: var(--spacing-md);
         }
 
+        .article-snippet {
+            color: var(--text-secondary);
+            line-height: 1.7;
+            margin-bottom: var(--spacing-md);
+            font-style: italic;
+        }
+
+        .article-snippet mark {
+            background: var(--primary-100);
+            color: var(--primary-700);
+            font-style: normal;
+            padding: 0 0.125rem;
+            border-radius: 0.25rem;
+        }
+
         .article-text {
             color: var(--text-secondary);
             line-height: 1.8;
@@ -403,22 +416,6 @@ HTML_TEMPLATE = """
             border-top: 1px solid var(--border-color);
         }
 
-        .article-text.collapsed {
-            max-height: 150px;
-            overflow: hidden;
-            position: relative;
-        }
-
-        .article-text.collapsed::after {
-            content: '';
-            position: absolute;
-            bottom: 0;
-            left: 0;
-            right: 0;
-            height: 80px;
-            background: linear-gradient(to bottom, transparent, var(--bg-primary));
-        }
-
         .expand-btn {
             margin-top: var(--spacing-md);
             background: var(--gray-100);
@@ -646,16 +643,16 @@ HTML_TEMPLATE = """
                 <p class="article-description">{{ article.description }}</p>
                 {% endif %}
 
-                {% if article.full_text %}
-                <div class="article-text collapsed" id="text-{{ loop.index }}">
-                    {{ article.full_text }}
-                </div>
-                {% if article.full_text|length > 500 %}
+                {% if article.snippet %}
+                <p class="article-snippet">… {{ article.snippet|highlight }} …</p>
+                {% endif %}
+
+                {% if article.text_length %}
+                <div class="article-text" id="text-{{ loop.index }}" data-article-id="{{ article.id }}" hidden></div>
                 <button class="expand-btn" onclick="toggleText('text-{{ loop.index }}', this)">
-                    📖 Leggi tutto ({{ article.full_text|length }} caratteri)
+                    📖 Leggi tutto ({{ article.text_length }} caratteri)
                 </button>
                 {% endif %}
-                {% endif %}
 
                 <a href="{{ article.url }}" target="_blank" class="article-link">
                     🔗 Leggi articolo originale →
@@ -664,7 +661,23 @@ HTML_TEMPLATE = """
             {% endfor %}
 
             <!-- Pagination -->
-            {% if total_pages > 1 %}
+            {% if prev_cursor or next_cursor %}
+            <div class="pagination">
+                {% if prev_cursor %}
+                <a href="?before={{ prev_cursor }}{% if selected_source %}&source={{ selected_source|urlencode }}{% endif %}">
+                    ← Precedente
+                </a>
+                {% endif %}
+
+                <span>{{ total_results }} articoli</span>
+
+                {% if next_cursor %}
+                <a href="?after={{ next_cursor }}{% if selected_source %}&source={{ selected_source|urlencode }}{% endif %}">
+                    Successiva →
+                </a>
+                {% endif %}
+            </div>
+            {% elif total_pages > 1 %}
             <div class="pagination">
                 {% if page > 1 %}
                 <a href="?page={{ page - 1 }}{% if search %}&search={{ search }}{% endif %}{% if selected_source %}&source={{ selected_source }}{% endif %}">
@@ -694,14 +707,26 @@ HTML_TEMPLATE = """
     <script>
     function toggleText(id, btn) {
         const textDiv = document.getElementById(id);
-        if (textDiv.classList.contains('collapsed')) {
-            textDiv.classList.remove('collapsed');
-            btn.innerHTML = '📕 Comprimi';
-        } else {
-            textDiv.classList.add('collapsed');
+        if (!textDiv.hidden) {
+            textDiv.hidden = true;
             const charCount = textDiv.textContent.trim().length;
             btn.innerHTML = `📖 Leggi tutto (${charCount} caratteri)`;
+            return;
         }
+        if (textDiv.dataset.loaded) {
+            textDiv.hidden = false;
+            btn.innerHTML = '📕 Comprimi';
+            return;
+        }
+        // Il testo completo viene caricato solo quando richiesto
+        fetch(`/article/${textDiv.dataset.articleId}/text`)
+            .then(response => response.json())
+            .then(data => {
+                textDiv.textContent = data.text || '';
+                textDiv.dataset.loaded = '1';
+                textDiv.hidden = false;
+                btn.innerHTML = '📕 Comprimi';
+            });
     }
 
     // Smooth scroll per i link interni
@@ -726,121 +751,62 @@ HTML_TEMPLATE = """
 </html>
 """
 
-def get_db_connection():
-    """Connessione al database (SQLite o PostgreSQL)"""
-    if USE_POSTGRES:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    else:
-        conn = sqlite3.connect('onconews.db')
-        conn.row_factory = sqlite3.Row
-        return conn
+_db = None
+
+
+def get_db() -> NewsDatabase:
+    """Istanza condivisa di NewsDatabase (pool di connessioni, ricerca full-text)"""
+    global _db
+    if _db is None:
+        _db = NewsDatabase('onconews.db')
+    return _db
+
+
+@app.template_filter('highlight')
+def highlight(snippet):
+    """Evidenzia con <mark> i termini trovati da NewsDatabase.search (dopo l'escaping HTML)"""
+    return Markup(escape(snippet).replace(HIGHLIGHT_START, Markup('<mark>'))
+                  .replace(HIGHLIGHT_END, Markup('</mark>')))
+
 
 @app.route('/')
 def index():
     """Pagina principale con lista articoli"""
-    conn = get_db_connection()
-
     # Parametri di ricerca
     search = request.args.get('search', '')
     source = request.args.get('source', '')
     page = int(request.args.get('page', 1))
+    after = request.args.get('after', '')
+    before = request.args.get('before', '')
     per_page = 20
+    total_pages = 0
+    next_cursor = prev_cursor = None
+
+    # Statistiche e fonti da news_stats (aggiornata dai trigger, nessun COUNT(*) su news)
+    db = get_db()
+    db_stats = db.get_statistics()
+    stats = {
+        'total': db_stats['total_articles'],
+        'scraped': db_stats['scraped_articles'],
+        'pending': db_stats['pending_scraping'],
+        'failed': db_stats['failed_scraping']
+    }
+    sources = db.get_sources()
 
-    if USE_POSTGRES:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Statistiche
-        cursor.execute('SELECT COUNT(*) as count FROM news')
-        stats_total = cursor.fetchone()['count']
-
-        cursor.execute('SELECT COUNT(*) as count FROM news WHERE full_text IS NOT NULL')
-        stats_scraped = cursor.fetchone()['count']
-
-        cursor.execute('SELECT COUNT(*) as count FROM news WHERE full_text IS NULL AND scraping_status != %s', ('failed',))
-        stats_pending = cursor.fetchone()['count']
-
-        cursor.execute('SELECT COUNT(*) as count FROM news WHERE scraping_status = %s', ('failed',))
-        stats_failed = cursor.fetchone()['count']
-
-        stats = {
-            'total': stats_total,
-            'scraped': stats_scraped,
-            'pending': stats_pending,
-            'failed': stats_failed
-        }
-
-        # Lista fonti per filtro
-        cursor.execute('SELECT DISTINCT source_name FROM news WHERE source_name IS NOT NULL ORDER BY source_name')
-        sources = [row['source_name'] for row in cursor.fetchall()]
-
-        # Query articoli con filtri
-        query = 'SELECT * FROM news WHERE 1=1'
-        params = []
-
-        if search:
-            query += ' AND (title LIKE %s OR description LIKE %s)'
-            params.extend([f'%{search}%', f'%{search}%'])
-
-        if source:
-            query += ' AND source_name = %s'
-            params.append(source)
-
-        query += ' ORDER BY published_at DESC'
-
-        # Conta totale risultati
-        count_query = query.replace('SELECT *', 'SELECT COUNT(*) as count')
-        cursor.execute(count_query, params)
-        total_results = cursor.fetchone()['count']
+    if search:
+        # Ricerca full-text (FTS5 / tsvector) ordinata per rilevanza
+        total_results = db.count_search(search, source or None)
         total_pages = (total_results + per_page - 1) // per_page
-
-        # Paginazione
-        query += ' LIMIT %s OFFSET %s'
-        params.extend([per_page, (page - 1) * per_page])
-
-        cursor.execute(query, params)
-        articles = cursor.fetchall()
+        articles = db.search(search, source or None, limit=per_page, offset=(page - 1) * per_page)
 
     else:
-        # SQLite
-        cursor = conn.cursor()
-
-        # Statistiche
-        stats = {
-            'total': conn.execute('SELECT COUNT(*) as count FROM news').fetchone()['count'],
-            'scraped': conn.execute('SELECT COUNT(*) as count FROM news WHERE full_text IS NOT NULL').fetchone()['count'],
-            'pending': conn.execute('SELECT COUNT(*) as count FROM news WHERE full_text IS NULL AND scraping_status != "failed"').fetchone()['count'],
-            'failed': conn.execute('SELECT COUNT(*) as count FROM news WHERE scraping_status = "failed"').fetchone()['count']
-        }
-
-        # Lista fonti per filtro
-        sources = [row['source_name'] for row in conn.execute('SELECT DISTINCT source_name FROM news WHERE source_name IS NOT NULL ORDER BY source_name').fetchall()]
-
-        # Query articoli con filtri
-        query = 'SELECT * FROM news WHERE 1=1'
-        params = []
-
-        if search:
-            query += ' AND (title LIKE ? OR description LIKE ?)'
-            params.extend([f'%{search}%', f'%{search}%'])
-
-        if source:
-            query += ' AND source_name = ?'
-            params.append(source)
-
-        query += ' ORDER BY published_at DESC'
-
-        # Conta totale risultati
-        total_results = conn.execute(query.replace('SELECT *', 'SELECT COUNT(*) as count'), params).fetchone()['count']
-        total_pages = (total_results + per_page - 1) // per_page
-
-        # Paginazione
-        query += ' LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
-
-        articles = conn.execute(query, params).fetchall()
-
-    conn.close()
+        # Lista a cursore: costo costante anche nelle pagine profonde
+        result = db.list_articles(source or None, after=after or None, before=before or None,
+                                  limit=per_page)
+        articles = result['articles']
+        next_cursor = result['next_cursor']
+        prev_cursor = result['prev_cursor']
+        total_results = db.count_articles(source or None)
 
     return render_template_string(
         HTML_TEMPLATE,
@@ -850,9 +816,21 @@ def index():
         search=search,
         selected_source=source,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        total_results=total_results,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
+@app.route('/article/<int:article_id>/text')
+def article_text(article_id):
+    """Testo completo di un articolo (caricato su richiesta dalla lista)"""
+    text = get_db().get_article_text(article_id)
+    if text is None:
+        return jsonify({'error': 'Testo non disponibile'}), 404
+    return jsonify({'text': text})
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("  ONCONEWS WEB VIEWER")